@@ -0,0 +1,27 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, TextIO
+
+__all__ = [
+    'write_atomically',
+    'write_json'
+]
+
+
+def write_atomically(path: Path, write: Callable[[TextIO], None], newline: str | None = None) -> None:
+    """
+    Writes to a temporary file next to `path` and renames it over `path`, so a crash never leaves a torn file.
+
+    The temporary file is hidden, so directory scanners skip it.
+
+    @param newline: passed to `open`, `''` for the `csv` module.
+    """
+    temporary = path.with_name(f'.{path.name}.tmp')
+    with open(temporary, mode='w', encoding='utf-8', newline=newline) as file:
+        write(file)
+    os.replace(temporary, path)
+
+
+def write_json(path: Path, value: Any) -> None:
+    write_atomically(path, lambda file: json.dump(value, file, indent=4))
@@ -0,0 +1,133 @@
+"""
+Micro-benchmark of `MotionDetector.detect`.
+
+Compares the detector modes against the original list-based implementation on synthetic frames and prints
+best-of-5 time per frame and the transient memory allocated per frame (as traced by `tracemalloc`).
+A static scene, a single repeated frame, is then measured with and without skipping static frames.
+
+    $> python scripts/bench_motion_detector.py --frames 2000
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from motion_detector import MotionDetector, DetectionMode, PreprocessPipeline, BlurMode, BLUR_KERNEL_SIZE
+
+SIZE = 92
+_REPEATS = 5
+
+
+class _LegacyMotionDetector:
+    """
+    The implementation `MotionDetector` replaced, kept as the benchmark baseline.
+    """
+
+    def __init__(self) -> None:
+        self._binary_threshold = MotionDetector.BINARIZATION_THRESHOLD_DEFAULT
+        self._difference_threshold = MotionDetector.DIFFERENCE_THRESHOLD_DEFAULT
+        self._sensitivity = MotionDetector.SENSITIVITY_DEFAULT
+        self._frame_buffer: list[np.ndarray] = list()
+
+    def detect(self, frame: np.ndarray) -> tuple[np.ndarray, int, bool]:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        frame = cv2.GaussianBlur(frame, BLUR_KERNEL_SIZE, 0)
+        height, width = frame.shape[:2]
+
+        self._frame_buffer = (self._frame_buffer[1:] + [frame]) if self._frame_buffer else [frame, frame, frame]
+
+        frame_0, frame_1, frame_2 = self._frame_buffer
+        diff_1, diff_2 = cv2.absdiff(frame_0, frame_1), cv2.absdiff(frame_1, frame_2)
+        frame_diff = cv2.bitwise_or(diff_1, diff_2)
+        _, frame_diff = cv2.threshold(frame_diff, self._binary_threshold, 255, cv2.THRESH_BINARY)
+
+        diff = cv2.countNonZero(frame_diff)
+        diff = diff * self._sensitivity // (height * width)
+
+        return frame_diff, diff, diff > self._difference_threshold
+
+
+def _frames(count: int, size: int) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed=0)
+    return [rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def _measure(detect: Callable[[np.ndarray], tuple], frames: list[np.ndarray]) -> tuple[float, float]:
+    """
+    @return: (ns per frame, allocated bytes per frame).
+    """
+    for frame in frames[:10]:
+        detect(frame)
+
+    best = None
+    for _ in range(_REPEATS):
+        start = time.perf_counter_ns()
+        for frame in frames:
+            detect(frame)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    ns_per_frame = best / len(frames)
+
+    tracemalloc.start()
+    allocated = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        detect(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current
+    tracemalloc.stop()
+
+    return ns_per_frame, allocated / len(frames)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=2_000)
+    parser.add_argument('--size', type=int, default=SIZE)
+    parser.add_argument('--history', type=int, default=MotionDetector.HISTORY_DEPTH_DEFAULT)
+    args = parser.parse_args()
+
+    frames = _frames(args.frames, args.size)
+    frame_bytes = args.size * args.size
+
+    candidates = {
+        'legacy': _LegacyMotionDetector().detect,
+        'ring buffer': MotionDetector(history_depth=args.history).detect,
+        'no skipping': MotionDetector(history_depth=args.history, skip_static_frames=False).detect,
+        'running avg': MotionDetector(mode=DetectionMode.RUNNING_AVERAGE).detect,
+        'downscaled': MotionDetector(history_depth=args.history, pipeline=PreprocessPipeline.DOWNSCALED).detect,
+        'box blur': MotionDetector(history_depth=args.history, blur_mode=BlurMode.BOX).detect,
+        'box blur 41': MotionDetector(history_depth=args.history, blur_mode=BlurMode.BOX, blur_kernel_size=41).detect
+    }
+
+    static_candidates = {
+        'ring buffer': MotionDetector(history_depth=args.history).detect,
+        'no skipping': MotionDetector(history_depth=args.history, skip_static_frames=False).detect,
+        'running avg': MotionDetector(mode=DetectionMode.RUNNING_AVERAGE).detect
+    }
+
+    print(f'{args.frames} frames of {args.size}x{args.size}, one grayscale frame is {frame_bytes} bytes')
+    for name, detect in candidates.items():
+        _print_measurement(name, _measure(detect, frames), frame_bytes)
+
+    print('Static scene')
+    static_frames = [frames[0]] * args.frames
+    for name, detect in static_candidates.items():
+        _print_measurement(name, _measure(detect, static_frames), frame_bytes)
+
+
+def _print_measurement(name: str, measurement: tuple[float, float], frame_bytes: int) -> None:
+    ns_per_frame, bytes_per_frame = measurement
+    print(
+        f'{name:>12}: {ns_per_frame:>10,.0f} ns/frame, '
+        f'{bytes_per_frame:>8,.0f} bytes/frame allocated '
+        f'(~{bytes_per_frame / frame_bytes:.1f} frame-sized buffers)'
+    )
+
+
+if __name__ == '__main__':
+    main()
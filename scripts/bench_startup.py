@@ -0,0 +1,126 @@
+"""
+Startup benchmark: time from launching the interpreter to the window being shown
+and to the first frame going through motion detection.
+
+Every run is a fresh interpreter, so imports are measured cold (apart from the OS file cache).
+`--eager` imports the heavy modules up front, as all of them used to be, for comparison.
+`--no-window` skips the window, for systems without a display.
+
+    $> python scripts/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_RUNS_DEFAULT = 5
+_EAGER_MODULES = ('cv2', 'pyautogui', 'PIL.ImageTk')
+_STAGES = ('imports', 'window', 'first_frame')
+
+
+def _child(launch_time: float, window: bool, eager: bool) -> None:
+    """
+    Runs in the measured interpreter, prints seconds since `launch_time` at every stage as JSON.
+    """
+    import importlib
+
+    if eager:
+        for name in _EAGER_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+    import numpy as np
+
+    from detection_worker import DetectionWorker
+    from preset import Preset
+
+    times = {'imports': time.time() - launch_time}
+
+    if window:
+        from gui import AutoFisherGUI, PresetViewModel
+        from preset_store import Preferences
+
+        # A fresh preferences file, so the window opens the same way every run and the user's file is left alone
+        preferences_dir = tempfile.TemporaryDirectory()
+        view_model = PresetViewModel(on_save=lambda _: None, on_delete=lambda _: None)
+        gui = AutoFisherGUI(
+            presets=[Preset()],
+            view_model=view_model,
+            preferences=Preferences(Path(preferences_dir.name) / 'preferences.json'),
+            on_start=lambda: None,
+            on_stop=lambda: None,
+            on_calibrate=lambda: None,
+            on_learn_mask=lambda: None,
+            on_export_statistics=lambda _: None,
+            on_statistics_to_mask=lambda: None,
+            on_export_session=lambda _: None
+        )
+        gui.update()
+        times['window'] = time.time() - launch_time
+        preferences_dir.cleanup()
+
+    size = Preset.DEFAULT_REGION_SIZE
+    frame = np.random.default_rng(seed=0).integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+    worker = DetectionWorker(
+        preset=Preset(),
+        grab=lambda _: frame,
+        is_game_active=lambda: True,
+        click=lambda _: None,
+        press=lambda _: None
+    )
+    worker.start()
+    try:
+        while True:
+            worker.raise_if_failed()
+            report = worker.reports.take()
+            if report is not None and report.motion_value is not None:
+                break
+            time.sleep(0.001)
+    finally:
+        worker.stop()
+    times['first_frame'] = time.time() - launch_time
+
+    print(json.dumps(times))
+
+
+def _run(window: bool, eager: bool) -> dict[str, float]:
+    command = [sys.executable, __file__, '--child', str(time.time())]
+    if not window:
+        command.append('--no-window')
+    if eager:
+        command.append('--eager')
+
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=_RUNS_DEFAULT)
+    parser.add_argument('--eager', action='store_true', help='import cv2, pyautogui and PIL.ImageTk up front')
+    parser.add_argument('--no-window', action='store_true', help='do not create the window')
+    parser.add_argument('--child', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.child, window=not args.no_window, eager=args.eager)
+        return
+
+    runs = [_run(window=not args.no_window, eager=args.eager) for _ in range(args.runs)]
+
+    print(f'{args.runs} runs, {"eager" if args.eager else "lazy"} imports, median / max since launch')
+    for stage in _STAGES:
+        times = [run[stage] for run in runs if stage in run]
+        if times:
+            print(f'{stage:>12}: {statistics.median(times) * 1_000:>6,.0f} / {max(times) * 1_000:>6,.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
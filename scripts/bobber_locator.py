@@ -0,0 +1,117 @@
+import base64
+
+import numpy as np
+
+from lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+__all__ = [
+    'BobberLocator',
+    'encode_template',
+    'decode_template'
+]
+
+
+def encode_template(template: np.ndarray | None) -> str:
+    """
+    @param template: (height, width) grayscale uint8 image.
+    @return: '<height>x<width>:<base64 of the pixels>', empty for no template.
+    """
+    if template is None:
+        return ''
+
+    height, width = template.shape
+
+    return f'{height}x{width}:{base64.b64encode(np.ascontiguousarray(template).tobytes()).decode("ascii")}'
+
+
+def decode_template(encoded: str) -> np.ndarray | None:
+    if not encoded:
+        return None
+
+    shape, data = encoded.split(':', maxsplit=1)
+    height, width = map(int, shape.split('x'))
+
+    return np.frombuffer(base64.b64decode(data), dtype=np.uint8).reshape(height, width).copy()
+
+
+class BobberLocator:
+    """
+    Finds the bobber in a frame by normalized cross-correlation with a template.
+
+    The search is coarse-to-fine: the whole frame is only matched at the coarsest pyramid level,
+    every finer level refines the match within a few pixels of the previous one. The template pyramid
+    is built once per template.
+    """
+
+    TEMPLATE_SIZE = 24
+
+    # Matches scoring lower are rejected, 1 is a perfect match
+    MIN_SCORE = 0.6
+
+    # Smallest template side worth matching at a coarser pyramid level
+    _MIN_LEVEL_SIZE = 8
+    # Search margin around the upscaled match of the coarser level, pixels
+    _REFINE_MARGIN = 2
+
+    def __init__(self, template: np.ndarray) -> None:
+        """
+        @param template: grayscale image of the bobber, converted like `MotionDetector` converts frames.
+        """
+        self._templates = [template]
+        while min(self._templates[-1].shape) // 2 >= BobberLocator._MIN_LEVEL_SIZE:
+            self._templates.append(cv2.pyrDown(self._templates[-1]))
+
+        # A flat template correlates with nothing
+        self._usable = float(np.std(template)) > 0
+
+    def locate(self, frame: np.ndarray) -> tuple[tuple[int, int], float] | None:
+        """
+        @param frame: RGB or grayscale frame to search, at least as large as the template.
+        @return: ((x, y) of the bobber center in the frame, match score), None if there is no good enough match.
+        """
+        if not self._usable:
+            return None
+
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+        template_height, template_width = self._templates[0].shape
+        height, width = image.shape
+        if height < template_height or width < template_width:
+            return None
+
+        images = [image]
+        for template in self._templates[1:]:
+            smaller = cv2.pyrDown(images[-1])
+            if smaller.shape[0] < template.shape[0] or smaller.shape[1] < template.shape[1]:
+                break
+            images.append(smaller)
+
+        level = len(images) - 1
+        _, score, _, (x, y) = cv2.minMaxLoc(
+            cv2.matchTemplate(images[level], self._templates[level], cv2.TM_CCOEFF_NORMED)
+        )
+
+        margin = BobberLocator._REFINE_MARGIN
+        for level in range(level - 1, -1, -1):
+            image, template = images[level], self._templates[level]
+            image_height, image_width = image.shape
+            template_height, template_width = template.shape
+
+            left = min(max(2 * x - margin, 0), image_width - template_width)
+            top = min(max(2 * y - margin, 0), image_height - template_height)
+            right = min(2 * x + margin + template_width, image_width)
+            bottom = min(2 * y + margin + template_height, image_height)
+
+            _, score, _, (x, y) = cv2.minMaxLoc(
+                cv2.matchTemplate(image[top:bottom, left:right], template, cv2.TM_CCOEFF_NORMED)
+            )
+            x, y = left + x, top + y
+
+        if not score >= BobberLocator.MIN_SCORE:
+            return None
+
+        template_height, template_width = self._templates[0].shape
+
+        return (x + template_width // 2, y + template_height // 2), float(score)
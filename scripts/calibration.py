@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from motion_detector import MotionDetector
+
+__all__ = [
+    'Thresholds',
+    'NoiseCalibrator'
+]
+
+_LEVELS = 256
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    binarization_threshold: int
+    sensitivity: int
+    difference_threshold: int
+
+
+class NoiseCalibrator:
+    """
+    Learns the noise distribution of the detector difference score from frames without bites
+    and proposes thresholds that keep false detections at a target rate.
+
+    For every frame the raw (not yet binarized) difference image is reduced to a histogram of
+    pixel differences. From it the difference score the detector would report is derived for every
+    possible binarization threshold at once and added to a (threshold, score) histogram.
+    Memory use does not depend on how long calibration runs.
+    """
+
+    FALSE_POSITIVE_RATE_DEFAULT = 0.001
+
+    # Scores are tracked at the finest resolution the detector supports,
+    # which is also the sensitivity proposed by calibration
+    SENSITIVITY = MotionDetector.SENSITIVITY_MAX
+
+    # Largest share of the region, in 1/SENSITIVITY, that noise may cover at the proposed binarization threshold
+    MAX_NOISE_SCORE = 20
+
+    # Added to the observed noise quantile to absorb noise not seen while calibrating
+    DIFFERENCE_MARGIN = 1
+
+    # Lowest binarization threshold proposed. Over quiet water lower ones pass the noise check, but a level or two
+    # is within the rounding of the blur and of capture, which changes with lighting calibration never saw
+    MIN_BINARIZATION_THRESHOLD = 2
+
+    def __init__(self) -> None:
+        self._frames = 0
+        self._score_histograms = np.zeros((_LEVELS, NoiseCalibrator.SENSITIVITY + 1), dtype=np.int64)
+
+        self._levels = np.arange(_LEVELS)
+
+    @property
+    def frames(self) -> int:
+        return self._frames
+
+    def update(self, raw_difference: np.ndarray) -> None:
+        """
+        @param raw_difference: difference image before binarization, see `MotionDetector.raw_difference`.
+        """
+        area = raw_difference.size
+
+        pixel_histogram = np.bincount(raw_difference.ravel(), minlength=_LEVELS)
+        # Binarization keeps pixels strictly greater than the threshold
+        above = area - np.cumsum(pixel_histogram)
+        scores = above * NoiseCalibrator.SENSITIVITY // area
+
+        self._score_histograms[self._levels, scores] += 1
+
+        self._frames += 1
+
+    def _noise_quantiles(self, false_positive_rate: float) -> np.ndarray:
+        """
+        @return: per binarization threshold, the smallest score exceeded by at most `false_positive_rate` of frames.
+        """
+        allowed = false_positive_rate * self._frames
+        exceeding = self._frames - np.cumsum(self._score_histograms, axis=1)
+
+        return np.argmax(exceeding <= allowed, axis=1)
+
+    def propose(self, false_positive_rate: float = FALSE_POSITIVE_RATE_DEFAULT) -> Thresholds:
+        """
+        Picks the lowest binarization threshold, but at least `MIN_BINARIZATION_THRESHOLD`, at which noise
+        stays within `MAX_NOISE_SCORE`, and a difference threshold just above the noise score at the requested false positive rate.
+        """
+        if self._frames == 0:
+            raise ValueError('No frames observed')
+
+        quantiles = self._noise_quantiles(false_positive_rate)
+        candidates = np.flatnonzero(quantiles <= NoiseCalibrator.MAX_NOISE_SCORE)
+        binarization_threshold = int(candidates[0]) if len(candidates) else MotionDetector.BINARIZATION_THRESHOLD_MAX
+        binarization_threshold = max(binarization_threshold, NoiseCalibrator.MIN_BINARIZATION_THRESHOLD)
+
+        difference_threshold = int(quantiles[binarization_threshold]) + NoiseCalibrator.DIFFERENCE_MARGIN
+
+        return Thresholds(
+            binarization_threshold=binarization_threshold,
+            sensitivity=NoiseCalibrator.SENSITIVITY,
+            difference_threshold=min(difference_threshold, MotionDetector.DIFFERENCE_THRESHOLD_MAX)
+        )
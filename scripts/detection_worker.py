@@ -0,0 +1,759 @@
+import dataclasses
+import functools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+import numpy as np
+
+from bobber_locator import BobberLocator, decode_template
+from calibration import NoiseCalibrator
+from frame_pacer import FramePacer
+from metrics import Metrics
+from pixel_statistics import PixelStatistics
+from motion_detector import BatchMotionDetector, MotionDetector, PreprocessPipeline
+from preset import Preset
+from recording import FrameRecorder
+from region_tracker import RegionTracker
+from roi_mask import decode_mask, fit_mask, mask_from_variance
+from session_stats import SessionStatistics
+from statemachine import FishingStateMachine, TransitionEvent, TransitionKind
+
+__all__ = [
+    'BUFF_HOTKEY',
+    'MASK_DEVIATION_RATIO',
+    'PREVIEW_FPS',
+    'LatestValue',
+    'DetectionReport',
+    'PreviewImages',
+    'DetectionWorker'
+]
+
+BUFF_HOTKEY = 'b'
+
+# Pixels whose brightness deviates by more than this share of the binarization threshold
+# while learning a mask are left out of it
+MASK_DEVIATION_RATIO = 0.5
+
+# Reports carry preview images at most this often, the GUI does not refresh any faster
+PREVIEW_FPS = 15
+
+T = TypeVar('T')
+
+Region = tuple[int, int, int, int]
+
+
+def _region_centers(preset: Preset) -> list[tuple[int, int]]:
+    return [(preset.screen_x, preset.screen_y), *(tuple(center) for center in preset.extra_regions)]
+
+
+def _configure(motion_detector: MotionDetector | BatchMotionDetector, preset: Preset) -> None:
+    motion_detector.binary_threshold = preset.binarization_threshold
+    motion_detector.difference_threshold = preset.difference_threshold
+    motion_detector.sensitivity = preset.sensitivity
+    motion_detector.history_depth = preset.history_depth
+    motion_detector.mode = preset.detection_mode
+    motion_detector.learning_rate = preset.learning_rate
+    motion_detector.pipeline = preset.preprocess_pipeline
+    motion_detector.blur_mode = preset.blur_mode
+    # Resolved from the configured region rather than the captured one, so a shrunk tracking window keeps the blur
+    motion_detector.blur_kernel_size = \
+        preset.blur_kernel_size or MotionDetector.auto_blur_kernel_size(preset.region_width, preset.region_height)
+
+
+def _preview_copy(image: np.ndarray | list[np.ndarray]) -> np.ndarray:
+    """
+    @param image: an image, or images to show side by side.
+    """
+    return np.hstack(image) if isinstance(image, list) else image.copy()
+
+
+class LatestValue(Generic[T]):
+    """
+    Single-slot, latest-value-wins channel between two threads. `put` never blocks.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value: T | None = None
+
+    def put(self, value: T) -> None:
+        with self._lock:
+            self._value = value
+
+    def take(self) -> T | None:
+        with self._lock:
+            value, self._value = self._value, None
+
+        return value
+
+
+@dataclass(frozen=True)
+class DetectionReport:
+    game_active: bool
+    motion_value: int | None = None
+    status: str | None = None
+    fps: float = 0.0
+    dropped_frames: int = 0
+
+
+@dataclass(frozen=True)
+class PreviewImages:
+    region: np.ndarray
+    difference: np.ndarray | None = None
+    heatmap: np.ndarray | None = None
+
+
+class DetectionWorker:
+    """
+    Runs capture, motion detection and the fishing state machine on a dedicated thread.
+
+    Settings are read from the latest `preset` snapshot handed over by the GUI thread, results are
+    published to `reports`. Nothing on the detection path waits for the GUI.
+    """
+
+    def __init__(
+            self,
+            preset: Preset,
+            grab: Callable[[Region], np.ndarray],
+            is_game_active: Callable[[], bool],
+            click: Callable[[tuple[int, int]], None],
+            press: Callable[[str], None],
+            recorder: FrameRecorder | None = None,
+            is_bite_marked: Callable[[], bool] | None = None,
+            grab_gray: Callable[[Region], np.ndarray] | None = None
+    ) -> None:
+        """
+        @param recorder: if given, every frame captured while the game is active is recorded.
+        @param is_bite_marked: polled every frame while recording, a rising edge is recorded as a bite marker.
+        @param grab_gray: grayscale capture, used instead of `grab` by the downscaled preprocessing pipeline.
+        """
+        self._preset: Preset = preset
+        self._grab = grab
+        self._grab_gray = grab_gray
+        self._is_game_active = is_game_active
+        self._click_fn = click
+        self._press_fn = press
+        self._recorder = recorder
+        self._is_bite_marked = is_bite_marked
+        self._bite_marked = False
+
+        self._pacer = FramePacer(target_fps=preset.target_fps)
+        self._motion_detector = MotionDetector()
+        self._batch_motion_detector = BatchMotionDetector()
+        self._state_machine = FishingStateMachine(cast=self._click, reel_in=self._click)
+        # State machines of `preset.extra_regions`, the primary region keeps `_state_machine`
+        self._extra_state_machines: list[FishingStateMachine] = []
+        self._region_tracker = RegionTracker()
+        # Locator of `preset.bobber_template` as (encoded template, locator)
+        self._bobber_locator: tuple[str, BobberLocator | None] = ('', None)
+        self._locate_pending = False
+        self._last_buff_time = time.time()
+
+        self._metrics = Metrics()
+        self._session_statistics = SessionStatistics()
+        self._state_machine.subscribe(self._on_transition)
+
+        self._reports: LatestValue[DetectionReport] = LatestValue()
+        # Published apart from the reports, which are replaced every frame, so a preview is not lost
+        # to a later report that carries none
+        self._previews: LatestValue[PreviewImages] = LatestValue()
+        self._calibrations: LatestValue[Preset] = LatestValue()
+
+        self._calibration_request: float | None = None
+        self._calibrator: NoiseCalibrator | None = None
+        self._calibration_end: float = 0.0
+
+        self._masks: LatestValue[np.ndarray] = LatestValue()
+        self._mask_learning_request: float | None = None
+        self._mask_statistics: PixelStatistics | None = None
+        self._mask_learning_end: float = 0.0
+        # `preset.roi_mask` cut to the captured region, and what it was cut for
+        self._mask_key: tuple | None = None
+        self._region_mask: np.ndarray | None = None
+
+        # Live noise statistics of the preprocessed frames, kept while enabled
+        self._statistics_enabled = False
+        self._pixel_statistics: PixelStatistics | None = None
+        self._statistics_requested = threading.Event()
+        self._statistics: LatestValue[PixelStatistics] = LatestValue()
+
+        self._previews_enabled = True
+        self._last_preview_time = 0.0
+
+        self._fishing = threading.Event()
+        self._reset_requested = threading.Event()
+        self._stop_requested = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='DetectionWorker', daemon=True)
+        self._error: BaseException | None = None
+
+    @property
+    def preset(self) -> Preset:
+        return self._preset
+
+    @preset.setter
+    def preset(self, value: Preset) -> None:
+        self._preset = value
+
+    @property
+    def reports(self) -> LatestValue[DetectionReport]:
+        return self._reports
+
+    @property
+    def previews(self) -> LatestValue[PreviewImages]:
+        """
+        Preview images, published at most `PREVIEW_FPS` times per second while `previews_enabled`.
+        """
+        return self._previews
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    @property
+    def session_statistics(self) -> SessionStatistics:
+        """
+        Casts, bites and reel-ins of all regions since the worker was created.
+        """
+        return self._session_statistics
+
+    @property
+    def calibrations(self) -> LatestValue[Preset]:
+        """
+        Presets proposed by finished calibrations.
+        """
+        return self._calibrations
+
+    @property
+    def masks(self) -> LatestValue[np.ndarray]:
+        """
+        Region of interest masks proposed by finished mask learning, at the scale of the preprocessed frames.
+        """
+        return self._masks
+
+    @property
+    def statistics_enabled(self) -> bool:
+        """
+        While enabled, per-pixel noise statistics of the primary region are accumulated
+        and reports carry their heatmap. Enabling starts from scratch.
+        """
+        return self._statistics_enabled
+
+    @statistics_enabled.setter
+    def statistics_enabled(self, value: bool) -> None:
+        self._statistics_enabled = value
+
+    @property
+    def previews_enabled(self) -> bool:
+        """
+        While disabled, no `previews` are published, so no frames are copied or heatmaps rendered for them.
+        """
+        return self._previews_enabled
+
+    @previews_enabled.setter
+    def previews_enabled(self, value: bool) -> None:
+        self._previews_enabled = value
+
+    @property
+    def statistics(self) -> LatestValue[PixelStatistics]:
+        """
+        Snapshots of the live noise statistics, see `request_statistics`.
+        """
+        return self._statistics
+
+    def request_statistics(self) -> None:
+        """
+        Publishes a snapshot of the live noise statistics to `statistics` on the next frame the game is active.
+        While no statistics are collected, because they are disabled or there are extra regions,
+        the snapshot is empty rather than the request waiting for statistics enabled later.
+        """
+        self._statistics_requested.set()
+
+    def start_mask_learning(self, duration: float) -> None:
+        """
+        Observes the detection region for `duration` seconds of active game time and proposes a mask
+        leaving out pixels that change on their own. There must be no bites while learning.
+        """
+        self._mask_learning_request = duration
+
+    def start_calibration(self, duration: float) -> None:
+        """
+        Observes the detection region for `duration` seconds of active game time and proposes
+        thresholds for the current preset. There must be no bites while calibrating.
+        """
+        self._calibration_request = duration
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_requested.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def start_fishing(self) -> None:
+        self._last_buff_time = time.time()
+        self._fishing.set()
+
+    def stop_fishing(self) -> None:
+        self._fishing.clear()
+        self._reset_requested.set()
+
+    def _click(self, region: int = 0) -> None:
+        centers = _region_centers(self._preset)
+        if region >= len(centers):
+            return
+
+        x, y = centers[region]
+        self._click_fn((x, y + self._preset.region_height))
+
+    @property
+    def state_machine(self) -> FishingStateMachine:
+        """
+        Subscribers to its transitions are called on the worker thread.
+        """
+        return self._state_machine
+
+    def _on_transition(self, event: TransitionEvent, region: int = 0) -> None:
+        metrics = self._metrics
+        # The session statistics decide which reel-ins were false, so both count the same ones
+        false_positive = self._session_statistics.observe(event, region)
+
+        if region == 0:
+            self._track(event)
+
+        if event.kind == TransitionKind.CAST_ISSUED:
+            metrics.increment(Metrics.CASTS)
+        elif event.kind == TransitionKind.REEL_IN_ISSUED:
+            metrics.increment(Metrics.REEL_INS)
+            metrics.record(Metrics.BITE_TO_CLICK, int(event.latency * 1e9))
+
+            if false_positive:
+                metrics.increment(Metrics.FALSE_POSITIVES)
+
+    def _track(self, event: TransitionEvent) -> None:
+        if event.kind == TransitionKind.CAST_ISSUED:
+            self._region_tracker.begin()
+        elif event.kind == TransitionKind.CAST_SETTLED:
+            self._region_tracker.locate()
+            self._locate_pending = True
+
+    def _locate_bobber(self, preset: Preset, frame: np.ndarray) -> None:
+        """
+        Re-centers the tracking window on the bobber template if it is found in the full region `frame`,
+        otherwise the window stays where the motion of the cast put it.
+        """
+        if preset.bobber_template != self._bobber_locator[0]:
+            template = decode_template(preset.bobber_template)
+            self._bobber_locator = (preset.bobber_template, None if template is None else BobberLocator(template))
+
+        locator = self._bobber_locator[1]
+        if locator is None:
+            return
+
+        located = locator.locate(frame)
+        if located is None:
+            return
+
+        (x, y), _ = located
+        height, width = frame.shape[:2]
+        self._region_tracker.place((x + 0.5) / width, (y + 0.5) / height)
+
+    def _run(self) -> None:
+        try:
+            while not self._stop_requested.is_set():
+                self._update()
+                self._pacer.wait()
+        except BaseException as error:
+            self._error = error
+        finally:
+            if self._recorder is not None:
+                self._recorder.close()
+
+    def _update(self) -> None:
+        preset = self._preset
+        motion_detector = self._motion_detector
+        state_machine = self._state_machine
+        pacer = self._pacer
+        metrics = self._metrics
+
+        if self._reset_requested.is_set():
+            self._reset_requested.clear()
+            state_machine.reset()
+            self._region_tracker.reset()
+            self._locate_pending = False
+            for extra_state_machine in self._extra_state_machines:
+                extra_state_machine.reset()
+
+        pacer.target_fps = preset.target_fps
+
+        if preset.extra_regions:
+            self._update_regions(preset)
+            return
+
+        learning_mask = self._mask_learning_request is not None or self._mask_statistics is not None
+        calibrating = self._calibration_request is not None or self._calibrator is not None
+
+        _configure(motion_detector, preset)
+        # Skipped frames repeat the previous one exactly, their zero differences would bias the measured noise low
+        measuring_noise = learning_mask or calibrating or self._statistics_enabled
+        motion_detector.skip_static_frames = preset.skip_static_frames and not measuring_noise
+        motion_detector.static_tolerance = preset.static_tolerance
+
+        width, height = preset.region_width, preset.region_height
+        full_region = (preset.screen_x - width // 2, preset.screen_y - height // 2, width, height)
+        # Recordings need a constant frame size and masks are learned over the full region
+        adaptive = preset.adaptive_region and self._recorder is None and not learning_mask
+        region = self._region_tracker.region(full_region, preset.tracking_size) if adaptive else full_region
+        motion_detector.mask = self._mask_for(preset, full_region, region)
+
+        frame_start = time.perf_counter_ns()
+        frame = self._capture_function(preset)(region)
+        timestamp = time.time()
+        capture_end = time.perf_counter_ns()
+        metrics.record(Metrics.CAPTURE, capture_end - frame_start)
+        metrics.set(Metrics.DROPPED_FRAMES, pacer.dropped_frames)
+
+        game_active = self._is_game_active()
+
+        if not game_active:
+            self._publish(frame, game_active=False)
+            return
+
+        preprocess_start = time.perf_counter_ns()
+        preprocessed = motion_detector.preprocess(frame)
+        preprocess_end = time.perf_counter_ns()
+        metrics.record(Metrics.PREPROCESS, preprocess_end - preprocess_start)
+
+        if self._recorder is not None:
+            self._record(preprocessed if self._recorder.preprocessed else frame, timestamp)
+
+        self._update_statistics(preprocessed)
+
+        difference_start = time.perf_counter_ns()
+        difference, motion_value, motion_detected = motion_detector.detect_preprocessed(preprocessed)
+        difference_end = time.perf_counter_ns()
+        metrics.record(Metrics.DIFFERENCE, difference_end - difference_start)
+        metrics.increment(Metrics.FRAMES)
+        if motion_detector.static:
+            metrics.increment(Metrics.STATIC_FRAMES)
+        if motion_detector.skipped:
+            metrics.increment(Metrics.SKIPPED_FRAMES)
+
+        if adaptive:
+            self._region_tracker.observe(difference)
+
+        if learning_mask:
+            status = self._learn_mask(preset, preprocessed)
+            self._publish(frame, game_active=True, difference=difference, motion_value=motion_value, status=status)
+            return
+
+        if calibrating:
+            status = self._calibrate(preset)
+            self._publish(frame, game_active=True, difference=difference, motion_value=motion_value, status=status)
+            return
+
+        if not self._fishing.is_set():
+            self._publish(frame, game_active=True, difference=difference, motion_value=motion_value)
+            return
+
+        state_machine_start = time.perf_counter_ns()
+        state_machine.update(motion_detected, frame_timestamp=timestamp)
+        state_machine_end = time.perf_counter_ns()
+        metrics.record(Metrics.STATE_MACHINE, state_machine_end - state_machine_start)
+        metrics.record(Metrics.FRAME, state_machine_end - frame_start)
+
+        if self._locate_pending:
+            self._locate_pending = False
+            if adaptive:
+                self._locate_bobber(preset, frame)
+
+        self._publish(
+            frame,
+            game_active=True,
+            difference=difference,
+            motion_value=motion_value,
+            status=state_machine.state_description
+        )
+
+        self._maybe_buff(preset)
+
+    def _update_regions(self, preset: Preset) -> None:
+        """
+        Fishes the primary and all extra regions at once, each with its own state machine.
+        All regions are captured in one grab of their bounding box and detected in one batch.
+        Recording, calibration, the region of interest mask, mask learning, the noise heatmap and the adaptive region
+        only support the single region mode. They are skipped here, and pending calibration or mask learning requests
+        are dropped with a status rather than left to start once the extra regions are cleared.
+        """
+        batch_motion_detector = self._batch_motion_detector
+        metrics = self._metrics
+
+        _configure(batch_motion_detector, preset)
+        self._pixel_statistics = None
+        self._calibrator = None
+        self._mask_statistics = None
+
+        centers = _region_centers(preset)
+        state_machines = self._state_machines(len(centers))
+
+        width, height = preset.region_width, preset.region_height
+        left = min(x for x, _ in centers) - width // 2
+        top = min(y for _, y in centers) - height // 2
+        right = max(x for x, _ in centers) - width // 2 + width
+        bottom = max(y for _, y in centers) - height // 2 + height
+        offsets = [(x - width // 2 - left, y - height // 2 - top) for x, y in centers]
+
+        frame_start = time.perf_counter_ns()
+        capture = self._capture_function(preset)((left, top, right - left, bottom - top))
+        timestamp = time.time()
+        capture_end = time.perf_counter_ns()
+        metrics.record(Metrics.CAPTURE, capture_end - frame_start)
+        metrics.set(Metrics.DROPPED_FRAMES, self._pacer.dropped_frames)
+
+        # Regions side by side, in the order of `centers`, stacked only if a preview is published
+        regions_preview = [capture[y:y + height, x:x + width] for x, y in offsets]
+
+        if not self._is_game_active():
+            self._publish(regions_preview, game_active=False)
+            return
+
+        self._answer_statistics_request()
+
+        difference_start = time.perf_counter_ns()
+        differences, motion_values, motions_detected = batch_motion_detector.detect(capture, offsets, (width, height))
+        difference_end = time.perf_counter_ns()
+        metrics.record(Metrics.DIFFERENCE, difference_end - difference_start)
+
+        differences_preview = list(differences)
+        motion_value = int(motion_values.max())
+
+        unsupported = self._drop_single_region_requests()
+        if unsupported is not None:
+            self._publish(
+                regions_preview,
+                game_active=True,
+                difference=differences_preview,
+                motion_value=motion_value,
+                status=f'{unsupported} needs a single region'
+            )
+            return
+
+        if not self._fishing.is_set():
+            self._publish(
+                regions_preview,
+                game_active=True,
+                difference=differences_preview,
+                motion_value=motion_value,
+                status='Noise heatmap needs a single region' if self._statistics_enabled else None
+            )
+            return
+
+        state_machine_start = time.perf_counter_ns()
+        for state_machine, motion_detected in zip(state_machines, motions_detected):
+            state_machine.update(bool(motion_detected), frame_timestamp=timestamp)
+        state_machine_end = time.perf_counter_ns()
+        metrics.record(Metrics.STATE_MACHINE, state_machine_end - state_machine_start)
+        metrics.record(Metrics.FRAME, state_machine_end - frame_start)
+
+        self._publish(
+            regions_preview,
+            game_active=True,
+            difference=differences_preview,
+            motion_value=motion_value,
+            status=' | '.join(state_machine.state_description for state_machine in state_machines)
+        )
+
+        self._maybe_buff(preset)
+
+    def _drop_single_region_requests(self) -> str | None:
+        """
+        @return: name of the single region feature that was requested, if any, after dropping the request.
+        """
+        if self._calibration_request is not None:
+            self._calibration_request = None
+            return 'Calibration'
+
+        if self._mask_learning_request is not None:
+            self._mask_learning_request = None
+            return 'Learning a mask'
+
+        return None
+
+    def _capture_function(self, preset: Preset) -> Callable[[Region], np.ndarray]:
+        # Grayscale capture skips producing an RGB frame, which only raw recordings still need
+        gray = self._grab_gray is not None \
+            and preset.preprocess_pipeline == PreprocessPipeline.DOWNSCALED \
+            and (self._recorder is None or self._recorder.preprocessed)
+
+        return self._grab_gray if gray else self._grab
+
+    def _state_machines(self, count: int) -> list[FishingStateMachine]:
+        """
+        @return: state machines of the primary and the first `count - 1` extra regions, created as needed.
+        """
+        extra_state_machines = self._extra_state_machines
+
+        while len(extra_state_machines) < count - 1:
+            region = len(extra_state_machines) + 1
+            state_machine = FishingStateMachine(
+                cast=functools.partial(self._click, region),
+                reel_in=functools.partial(self._click, region)
+            )
+            state_machine.subscribe(functools.partial(self._on_transition, region=region))
+            extra_state_machines.append(state_machine)
+
+        del extra_state_machines[count - 1:]
+
+        return [self._state_machine, *extra_state_machines]
+
+    def _maybe_buff(self, preset: Preset) -> None:
+        buff_elapsed = time.time() - self._last_buff_time
+        if not preset.use_buffs or buff_elapsed < preset.buff_period:
+            return
+
+        self._press_fn(BUFF_HOTKEY)
+        self._last_buff_time = time.time()
+
+    def _calibrate(self, preset: Preset) -> str:
+        if self._calibration_request is not None:
+            self._calibrator = NoiseCalibrator()
+            self._calibration_end = time.time() + self._calibration_request
+            self._calibration_request = None
+
+        self._calibrator.update(self._motion_detector.masked_raw_difference)
+
+        remaining = self._calibration_end - time.time()
+        if remaining > 0:
+            return f'Calibrating ({remaining:.0f} s left)'
+
+        thresholds = self._calibrator.propose()
+        self._calibrator = None
+        self._calibrations.put(dataclasses.replace(
+            preset,
+            name=f'{preset.name} (calibrated)',
+            binarization_threshold=thresholds.binarization_threshold,
+            sensitivity=thresholds.sensitivity,
+            difference_threshold=thresholds.difference_threshold
+        ))
+
+        return 'Calibrated'
+
+    def _learn_mask(self, preset: Preset, preprocessed: np.ndarray) -> str:
+        if self._mask_learning_request is not None:
+            self._mask_statistics = PixelStatistics(preprocessed.shape)
+            self._mask_learning_end = time.time() + self._mask_learning_request
+            self._mask_learning_request = None
+
+        if self._mask_statistics.shape != preprocessed.shape:
+            # Region size or preprocessing changed while learning
+            self._mask_statistics = PixelStatistics(preprocessed.shape)
+
+        self._mask_statistics.update(preprocessed)
+
+        remaining = self._mask_learning_end - time.time()
+        if remaining > 0:
+            return f'Learning mask ({remaining:.0f} s left)'
+
+        max_deviation = max(preset.binarization_threshold, 1) * MASK_DEVIATION_RATIO
+        self._masks.put(mask_from_variance(self._mask_statistics.variance(), max_deviation))
+        self._mask_statistics = None
+
+        return 'Mask learned'
+
+    def _update_statistics(self, preprocessed: np.ndarray) -> None:
+        if not self._statistics_enabled:
+            self._pixel_statistics = None
+            self._answer_statistics_request()
+            return
+
+        if self._pixel_statistics is None or self._pixel_statistics.shape != preprocessed.shape:
+            self._pixel_statistics = PixelStatistics(preprocessed.shape)
+
+        self._pixel_statistics.update(preprocessed)
+        self._answer_statistics_request()
+
+    def _answer_statistics_request(self) -> None:
+        if not self._statistics_requested.is_set():
+            return
+
+        self._statistics_requested.clear()
+        statistics = self._pixel_statistics
+        self._statistics.put(statistics.copy() if statistics is not None else PixelStatistics((0, 0)))
+
+    def _mask_for(self, preset: Preset, full_region: Region, region: Region) -> np.ndarray | None:
+        """
+        @return: the preset mask scaled to the full region and cut to the captured `region`.
+        """
+        full_left, full_top, full_width, full_height = full_region
+        left, top, width, height = region
+        key = (preset.roi_mask, full_width, full_height, left - full_left, top - full_top, width, height)
+
+        if key != self._mask_key:
+            mask = decode_mask(preset.roi_mask)
+            if mask is not None:
+                x, y = left - full_left, top - full_top
+                mask = fit_mask(mask, full_height, full_width)[y:y + height, x:x + width]
+
+            self._mask_key = key
+            self._region_mask = mask
+
+        return self._region_mask
+
+    def _record(self, frame: np.ndarray, timestamp: float) -> None:
+        if self._is_bite_marked is not None:
+            bite_marked = self._is_bite_marked()
+            if bite_marked and not self._bite_marked:
+                self._recorder.mark_bite()
+            self._bite_marked = bite_marked
+
+        self._recorder.record(frame, timestamp)
+
+    def _publish(
+            self,
+            frame: np.ndarray | list[np.ndarray],
+            game_active: bool,
+            difference: np.ndarray | list[np.ndarray] | None = None,
+            motion_value: int | None = None,
+            status: str | None = None
+    ) -> None:
+        """
+        @param frame: region frame, or the frames of several regions to show side by side.
+        @param difference: same for the difference images.
+        """
+        self._reports.put(DetectionReport(
+            game_active=game_active,
+            motion_value=motion_value,
+            status=status,
+            fps=self._pacer.achieved_fps,
+            dropped_frames=self._pacer.dropped_frames
+        ))
+
+        if not self._preview_due():
+            return
+
+        statistics = self._pixel_statistics
+
+        # Frames may live in buffers reused by the next capture, so the GUI gets its own copies
+        self._previews.put(PreviewImages(
+            region=_preview_copy(frame),
+            difference=_preview_copy(difference) if difference is not None else None,
+            heatmap=statistics.heatmap() if statistics is not None else None
+        ))
+
+    def _preview_due(self) -> bool:
+        if not self._previews_enabled:
+            return False
+
+        now = time.perf_counter()
+        if now - self._last_preview_time < 1 / PREVIEW_FPS:
+            return False
+
+        self._last_preview_time = now
+
+        return True
@@ -0,0 +1,93 @@
+import time
+from collections import deque
+from typing import Callable
+
+__all__ = [
+    'FramePacer'
+]
+
+
+class FramePacer:
+    """
+    Keeps a loop running at a fixed target rate.
+
+    Deadlines are scheduled on an absolute timeline, so time spent doing work and sleep overshoot
+    are compensated on the next frame instead of accumulating. When the loop falls behind by a whole
+    frame or more the missed frames are counted as dropped and the timeline is re-anchored to now.
+    """
+
+    TARGET_FPS_DEFAULT = 60
+    TARGET_FPS_MIN = 1
+    TARGET_FPS_MAX = 240
+
+    _FPS_WINDOW = 60
+
+    def __init__(
+            self,
+            target_fps: int = TARGET_FPS_DEFAULT,
+            clock: Callable[[], float] = time.perf_counter,
+            sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+
+        self._target_fps: int = target_fps
+        self._deadline: float | None = None
+        self._dropped_frames: int = 0
+        self._ticks: deque[float] = deque(maxlen=FramePacer._FPS_WINDOW)
+
+    @property
+    def target_fps(self) -> int:
+        return self._target_fps
+
+    @target_fps.setter
+    def target_fps(self, value: int) -> None:
+        value = max(FramePacer.TARGET_FPS_MIN, min(FramePacer.TARGET_FPS_MAX, value))
+        if value == self._target_fps:
+            return
+
+        self._target_fps = value
+        self._deadline = None
+
+    @property
+    def dropped_frames(self) -> int:
+        return self._dropped_frames
+
+    @property
+    def achieved_fps(self) -> float:
+        if len(self._ticks) < 2:
+            return 0.0
+
+        elapsed = self._ticks[-1] - self._ticks[0]
+        if elapsed <= 0:
+            return 0.0
+
+        return (len(self._ticks) - 1) / elapsed
+
+    def reset(self) -> None:
+        self._deadline = None
+        self._dropped_frames = 0
+        self._ticks.clear()
+
+    def wait(self) -> None:
+        """
+        Sleeps until the start of the next frame.
+        """
+        period = 1.0 / self._target_fps
+        now = self._clock()
+
+        if self._deadline is None:
+            self._deadline = now
+
+        self._deadline += period
+        remaining = self._deadline - now
+
+        if remaining > 0:
+            self._sleep(remaining)
+        else:
+            missed = int(-remaining / period)
+            if missed > 0:
+                self._dropped_frames += missed
+                self._deadline = now
+
+        self._ticks.append(self._clock())
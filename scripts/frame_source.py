@@ -0,0 +1,258 @@
+from pathlib import Path
+
+import numpy as np
+
+from frame_store import FrameStore
+from lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+__all__ = [
+    'FrameSource',
+    'GdiFrameSource',
+    'PyAutoGUIFrameSource',
+    'ReplayFrameSource'
+]
+
+Region = tuple[int, int, int, int]
+
+
+class FrameSource:
+    """
+    Capture backend. Frames are returned as (height, width, 3) RGB uint8 arrays.
+
+    The returned array may be a view into a buffer owned by the source which is overwritten by the next call
+    to `grab`. Copy it if it has to outlive the current frame.
+    """
+
+    def grab(self, region: Region) -> np.ndarray:
+        """
+        @param region: (left, top, width, height).
+        """
+        raise NotImplementedError()
+
+    def grab_gray(self, region: Region) -> np.ndarray:
+        """
+        Same as `grab` converted to a (height, width) grayscale frame, the same conversion `MotionDetector` applies.
+        Backends that can convert while capturing override this to skip the RGB frame.
+        """
+        return cv2.cvtColor(self.grab(region), cv2.COLOR_BGR2GRAY)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'FrameSource':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _ensure_buffer(buffer: np.ndarray | None, shape: tuple[int, ...]) -> np.ndarray:
+    if buffer is not None and buffer.shape == shape:
+        return buffer
+
+    return np.empty(shape, dtype=np.uint8)
+
+
+class PyAutoGUIFrameSource(FrameSource):
+    """
+    Legacy backend: every frame goes through PIL and allocates a new array.
+    """
+
+    def grab(self, region: Region) -> np.ndarray:
+        import pyautogui as pg
+
+        return np.array(pg.screenshot(region=region))
+
+
+class GdiFrameSource(FrameSource):
+    """
+    Persistent Windows GDI backend.
+
+    Screen and memory device contexts and the target bitmap are created once per region size.
+    Every `grab` blits the region into the bitmap and copies the bits straight into a preallocated
+    BGRA buffer, which is then converted in place into a preallocated RGB buffer.
+    """
+
+    _SRCCOPY = 0x00CC0020
+    _DIB_RGB_COLORS = 0
+    _BI_RGB = 0
+
+    def __init__(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        class BitmapInfoHeader(ctypes.Structure):
+            _fields_ = [
+                ('biSize', wintypes.DWORD),
+                ('biWidth', wintypes.LONG),
+                ('biHeight', wintypes.LONG),
+                ('biPlanes', wintypes.WORD),
+                ('biBitCount', wintypes.WORD),
+                ('biCompression', wintypes.DWORD),
+                ('biSizeImage', wintypes.DWORD),
+                ('biXPelsPerMeter', wintypes.LONG),
+                ('biYPelsPerMeter', wintypes.LONG),
+                ('biClrUsed', wintypes.DWORD),
+                ('biClrImportant', wintypes.DWORD)
+            ]
+
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+
+        user32.GetDC.argtypes = [wintypes.HWND]
+        user32.GetDC.restype = wintypes.HDC
+        user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        gdi32.CreateCompatibleBitmap.argtypes = [wintypes.HDC, ctypes.c_int, ctypes.c_int]
+        gdi32.CreateCompatibleBitmap.restype = wintypes.HBITMAP
+        gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        gdi32.BitBlt.argtypes = [
+            wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD
+        ]
+        gdi32.GetDIBits.argtypes = [
+            wintypes.HDC, wintypes.HBITMAP, wintypes.UINT, wintypes.UINT,
+            ctypes.c_void_p, ctypes.c_void_p, wintypes.UINT
+        ]
+
+        self._ctypes = ctypes
+        self._user32 = user32
+        self._gdi32 = gdi32
+
+        self._header = BitmapInfoHeader()
+        self._header.biSize = ctypes.sizeof(BitmapInfoHeader)
+        self._header.biPlanes = 1
+        self._header.biBitCount = 32
+        self._header.biCompression = GdiFrameSource._BI_RGB
+
+        self._screen_dc = user32.GetDC(None)
+        self._memory_dc = gdi32.CreateCompatibleDC(self._screen_dc)
+        self._bitmap = None
+        self._size: tuple[int, int] = (0, 0)
+
+        self._bgra: np.ndarray | None = None
+        self._rgb: np.ndarray | None = None
+        self._gray: np.ndarray | None = None
+
+    def _resize(self, width: int, height: int) -> None:
+        if self._size == (width, height):
+            return
+
+        gdi32 = self._gdi32
+
+        if self._bitmap is not None:
+            gdi32.DeleteObject(self._bitmap)
+
+        self._bitmap = gdi32.CreateCompatibleBitmap(self._screen_dc, width, height)
+        gdi32.SelectObject(self._memory_dc, self._bitmap)
+
+        self._header.biWidth = width
+        # Negative height requests a top-down DIB, matching NumPy row order
+        self._header.biHeight = -height
+
+        self._size = (width, height)
+
+    def grab(self, region: Region) -> np.ndarray:
+        _, _, width, height = region
+
+        self._rgb = _ensure_buffer(self._rgb, (height, width, 3))
+        cv2.cvtColor(self._capture(region), cv2.COLOR_BGRA2RGB, dst=self._rgb)
+
+        return self._rgb
+
+    def grab_gray(self, region: Region) -> np.ndarray:
+        _, _, width, height = region
+
+        self._gray = _ensure_buffer(self._gray, (height, width))
+        # Channels are deliberately read as RGBA: `MotionDetector` converts RGB frames with BGR weights,
+        # and this keeps fused captures identical to converting the output of `grab`
+        cv2.cvtColor(self._capture(region), cv2.COLOR_RGBA2GRAY, dst=self._gray)
+
+        return self._gray
+
+    def _capture(self, region: Region) -> np.ndarray:
+        """
+        @return: the BGRA buffer holding the region.
+        """
+        left, top, width, height = region
+
+        self._resize(width, height)
+        self._bgra = _ensure_buffer(self._bgra, (height, width, 4))
+
+        gdi32 = self._gdi32
+        gdi32.BitBlt(
+            self._memory_dc, 0, 0, width, height,
+            self._screen_dc, left, top, GdiFrameSource._SRCCOPY
+        )
+        gdi32.GetDIBits(
+            self._memory_dc, self._bitmap, 0, height,
+            self._bgra.ctypes.data, self._ctypes.byref(self._header), GdiFrameSource._DIB_RGB_COLORS
+        )
+
+        return self._bgra
+
+    def close(self) -> None:
+        if self._bitmap is not None:
+            self._gdi32.DeleteObject(self._bitmap)
+            self._bitmap = None
+
+        if self._memory_dc:
+            self._gdi32.DeleteDC(self._memory_dc)
+            self._memory_dc = None
+
+        if self._screen_dc:
+            self._user32.ReleaseDC(None, self._screen_dc)
+            self._screen_dc = None
+
+
+def _load_frames(path: Path) -> np.ndarray:
+    if path.suffix == '.npy':
+        return np.load(path, mmap_mode='r')
+
+    store = FrameStore(path)
+    if store.preprocessed:
+        raise ValueError(f'{path} holds preprocessed frames, raw captures are required')
+
+    return store.frames
+
+
+class ReplayFrameSource(FrameSource):
+    """
+    Replays frames from a frame store recording (see `recording`) or a `.npy` file
+    of shape (frames, height, width, 3).
+
+    The file is memory-mapped; every `grab` copies the next frame into one preallocated buffer.
+    The requested region is ignored: frames are returned at their recorded size.
+    """
+
+    def __init__(self, path: str | Path, loop: bool = True) -> None:
+        self._frames: np.ndarray = _load_frames(Path(path))
+        self._loop = loop
+        self._index = 0
+
+        self._buffer = np.empty(self._frames.shape[1:], dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def exhausted(self) -> bool:
+        return not self._loop and self._index >= len(self._frames)
+
+    def grab(self, region: Region) -> np.ndarray:
+        if self._index >= len(self._frames):
+            if not self._loop:
+                raise EOFError('Replay is exhausted')
+
+            self._index = 0
+
+        np.copyto(self._buffer, self._frames[self._index])
+        self._index += 1
+
+        return self._buffer
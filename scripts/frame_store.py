@@ -0,0 +1,173 @@
+"""
+Append-only, fixed-record container for long frame recordings.
+
+Layout: a fixed-size header followed by records of identical size, each holding a timestamp,
+a bite marker flag and the frame pixels. Because every record has the same size, frame `i` lives at
+a known offset: the reader memory-maps the file and exposes frames and timestamps as zero-copy
+NumPy views with O(1) random access, without loading the file into memory.
+A record cut short by a crash is ignored.
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+__all__ = [
+    'FrameStore',
+    'FrameStoreWriter'
+]
+
+_MAGIC = b'TAFRAMES'
+_VERSION = 1
+# magic, version, height, width, channels, flags
+_HEADER = struct.Struct('<8sIIIII')
+_HEADER_SIZE = 64
+
+_FLAG_PREPROCESSED = 0x1
+
+
+def _record_dtype(shape: tuple[int, int, int]) -> np.dtype:
+    return np.dtype([
+        ('timestamp', '<f8'),
+        ('bite', 'u1'),
+        ('frame', 'u1', shape)
+    ])
+
+
+def _frame_shape(shape: tuple[int, ...]) -> tuple[int, int, int]:
+    return (*shape, 1) if len(shape) == 2 else shape
+
+
+class FrameStoreWriter:
+    """
+    Appends frames to a frame store, creating it if needed.
+
+    @param preprocessed: marks the stored frames as single-channel output of the detector preprocessing.
+    """
+
+    def __init__(self, path: str | Path, shape: tuple[int, ...], preprocessed: bool = False) -> None:
+        self._path = Path(path)
+        self._shape = _frame_shape(shape)
+        self._preprocessed = preprocessed
+
+        self._record = np.zeros(1, dtype=_record_dtype(self._shape))
+        self._pending_bite = False
+
+        exists = self._path.exists() and self._path.stat().st_size >= _HEADER_SIZE
+        if exists:
+            store = FrameStore(self._path)
+            if store.shape != self._shape or store.preprocessed != preprocessed:
+                raise ValueError(f'{self._path} holds frames of another kind')
+            size = _HEADER_SIZE + len(store) * self._record.itemsize
+            del store
+
+            self._file = open(self._path, mode='r+b')
+            # Drop a partially written trailing record before appending
+            self._file.truncate(size)
+            self._file.seek(size)
+        else:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._path, mode='wb')
+            self._write_header()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def preprocessed(self) -> bool:
+        return self._preprocessed
+
+    def _write_header(self) -> None:
+        height, width, channels = self._shape
+        flags = _FLAG_PREPROCESSED if self._preprocessed else 0
+
+        header = _HEADER.pack(_MAGIC, _VERSION, height, width, channels, flags)
+        self._file.write(header.ljust(_HEADER_SIZE, b'\0'))
+
+    def append(self, frame: np.ndarray, timestamp: float) -> None:
+        record = self._record[0]
+        record['timestamp'] = timestamp
+        record['bite'] = self._pending_bite
+        record['frame'] = frame.reshape(self._shape)
+        self._pending_bite = False
+
+        self._file.write(memoryview(self._record))
+
+    def mark_bite(self) -> None:
+        """
+        Flags the next appended frame as the one a bite was observed at.
+        """
+        self._pending_bite = True
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'FrameStoreWriter':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class FrameStore:
+    """
+    Read-only, memory-mapped view of a frame store.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, mode='rb') as store_file:
+            header = store_file.read(_HEADER_SIZE)
+
+        if len(header) < _HEADER_SIZE:
+            raise ValueError(f'{path} is not a frame store')
+
+        magic, version, height, width, channels, flags = _HEADER.unpack_from(header)
+        if magic != _MAGIC:
+            raise ValueError(f'{path} is not a frame store')
+        if version != _VERSION:
+            raise ValueError(f'{path}: unsupported frame store version {version}')
+
+        self._shape = (height, width, channels)
+        self._preprocessed = bool(flags & _FLAG_PREPROCESSED)
+
+        dtype = _record_dtype(self._shape)
+        count = (Path(path).stat().st_size - _HEADER_SIZE) // dtype.itemsize
+
+        if count > 0:
+            self._records = np.memmap(path, dtype=dtype, mode='r', offset=_HEADER_SIZE, shape=(count,))
+        else:
+            self._records = np.zeros(0, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.frames[index]
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self._shape
+
+    @property
+    def preprocessed(self) -> bool:
+        return self._preprocessed
+
+    @property
+    def frames(self) -> np.ndarray:
+        """
+        (frames, height, width) view for preprocessed stores, (frames, height, width, channels) otherwise.
+        """
+        frames = self._records['frame']
+        return frames[..., 0] if self._shape[2] == 1 else frames
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._records['timestamp']
+
+    @property
+    def bites(self) -> np.ndarray:
+        """
+        @return: timestamps of the frames flagged as bites.
+        """
+        return self.timestamps[self._records['bite'] != 0]
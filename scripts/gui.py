@@ -1,24 +1,54 @@
-import json
 import tkinter as tk
 from dataclasses import fields
-from tkinter import ttk
-from typing import Collection, Callable, Any
+from tkinter import filedialog, ttk
+from typing import Collection, Callable
 
 import numpy as np
-import pyautogui as pg
-from PIL import Image, ImageTk
 
-from motion_detector import MotionDetector
+from bobber_locator import BobberLocator, encode_template
+from frame_pacer import FramePacer
+from lazy_import import lazy_module
+from motion_detector import MotionDetector, DetectionMode, PreprocessPipeline, BlurMode
 from preset import Preset
+from preset_store import Preferences
+from region_tracker import RegionTracker
+from roi_mask import decode_mask, encode_mask, fit_mask
+
+cv2 = lazy_module('cv2')
+pg = lazy_module('pyautogui')
+Image = lazy_module('PIL.Image')
+ImageTk = lazy_module('PIL.ImageTk')
 
 __all__ = [
     'PresetViewModel',
     'AutoFisherGUI'
 ]
 
-_tk = tk.Tk()
-_tk.withdraw()
-del _tk
+# Hidden root window that Tk variables and the main window belong to, created on first use
+_tk_root: tk.Tk | None = None
+
+
+def _ensure_tk_root() -> None:
+    global _tk_root
+
+    if _tk_root is None:
+        _tk_root = tk.Tk()
+        _tk_root.withdraw()
+
+
+class _RegionsVar:
+    """
+    Tk-variable-like holder for a list of (x, y) points, which Tk variables cannot represent.
+    """
+
+    def __init__(self) -> None:
+        self._points: list[list[int]] = []
+
+    def get(self) -> list[list[int]]:
+        return [list(point) for point in self._points]
+
+    def set(self, value: list[list[int]]) -> None:
+        self._points = [list(point) for point in value]
 
 
 class PresetViewModel:
@@ -30,23 +60,56 @@ class PresetViewModel:
         self._on_save = on_save
         self._on_delete = on_delete
 
+        _ensure_tk_root()
         self._name = tk.StringVar()
         self._binarization_threshold = tk.IntVar()
         self._sensitivity = tk.IntVar()
         self._difference_threshold = tk.IntVar()
+        self._history_depth = tk.IntVar()
+        self._detection_mode = tk.StringVar()
+        self._learning_rate = tk.IntVar()
         self._use_buffs = tk.BooleanVar()
         self._buff_period = tk.IntVar()
         self._screen_x = tk.IntVar()
         self._screen_y = tk.IntVar()
+        self._region_width = tk.IntVar()
+        self._region_height = tk.IntVar()
+        self._blur_kernel_size = tk.IntVar()
+        self._preprocess_pipeline = tk.StringVar()
+        self._blur_mode = tk.StringVar()
+        self._skip_static_frames = tk.BooleanVar()
+        self._static_tolerance = tk.IntVar()
+        self._adaptive_region = tk.BooleanVar()
+        self._tracking_size = tk.IntVar()
+        self._roi_mask = tk.StringVar()
+        self._bobber_template = tk.StringVar()
+        self._extra_regions = _RegionsVar()
+        self._target_fps = tk.IntVar()
 
     name = property(lambda self: self._name)
     binarization_threshold = property(lambda self: self._binarization_threshold)
     sensitivity = property(lambda self: self._sensitivity)
     difference_threshold = property(lambda self: self._difference_threshold)
+    history_depth = property(lambda self: self._history_depth)
+    detection_mode = property(lambda self: self._detection_mode)
+    learning_rate = property(lambda self: self._learning_rate)
     use_buffs = property(lambda self: self._use_buffs)
     buff_period = property(lambda self: self._buff_period)
     screen_x = property(lambda self: self._screen_x)
     screen_y = property(lambda self: self._screen_y)
+    region_width = property(lambda self: self._region_width)
+    region_height = property(lambda self: self._region_height)
+    blur_kernel_size = property(lambda self: self._blur_kernel_size)
+    preprocess_pipeline = property(lambda self: self._preprocess_pipeline)
+    blur_mode = property(lambda self: self._blur_mode)
+    skip_static_frames = property(lambda self: self._skip_static_frames)
+    static_tolerance = property(lambda self: self._static_tolerance)
+    adaptive_region = property(lambda self: self._adaptive_region)
+    tracking_size = property(lambda self: self._tracking_size)
+    roi_mask = property(lambda self: self._roi_mask)
+    bobber_template = property(lambda self: self._bobber_template)
+    extra_regions = property(lambda self: self._extra_regions)
+    target_fps = property(lambda self: self._target_fps)
 
     def _preset(self) -> Preset:
         filed_values = {}
@@ -73,29 +136,54 @@ class AutoFisherGUI:
     _TITLE = 'Auto Fisher'
     _ICON = 'icon.ico'
     _SET_POSITION_HOTKEY = 'Alt-f'
+    _ADD_REGION_HOTKEY = 'Alt-g'
+    _CAPTURE_TEMPLATE_HOTKEY = 'Alt-t'
+    _MASK_BRUSH_RADIUS = 4
+    # Brightness of preview pixels outside the region of interest
+    _MASKED_BRIGHTNESS = 0.3
 
     _PREFERENCES_PRESET_NAME = 'preset_name'
+    _PREFERENCES_PREVIEWS_SHOWN = 'previews_shown'
 
     def __init__(
             self,
             presets: Collection[Preset],
             view_model: PresetViewModel,
+            preferences: Preferences,
             on_start: Callable[[], None],
-            on_stop: Callable[[], None]
+            on_stop: Callable[[], None],
+            on_calibrate: Callable[[], None],
+            on_learn_mask: Callable[[], None],
+            on_export_statistics: Callable[[str], None],
+            on_statistics_to_mask: Callable[[], None],
+            on_export_session: Callable[[str], None]
     ) -> None:
         assert len(presets) > 0
 
+        _ensure_tk_root()
+
         self._presets = {it.name: it for it in presets}
         self._on_start = on_start
         self._on_stop = on_stop
+        self._on_calibrate = on_calibrate
+        self._on_learn_mask = on_learn_mask
+        self._on_export_statistics = on_export_statistics
+        self._on_statistics_to_mask = on_statistics_to_mask
+        self._on_export_session = on_export_session
 
+        self._preferences = preferences
         self._view_model = view_model
-        preset_name = _load_preferences().get(AutoFisherGUI._PREFERENCES_PRESET_NAME)
+        preset_name = preferences.get(AutoFisherGUI._PREFERENCES_PRESET_NAME)
         preset = self._presets.get(preset_name) or next(preset for preset in presets)
         self._view_model.bind(preset)
         self._selected = self._view_model.name
 
         self._game_active = False
+        self._region_preview_shape: tuple[int, int] | None = None
+        self._heatmap_enabled = tk.BooleanVar(value=False)
+        self._previews_shown = tk.BooleanVar(value=preferences.get(AutoFisherGUI._PREFERENCES_PREVIEWS_SHOWN, True))
+        # Last decoded `roi_mask` as (encoded, mask)
+        self._decoded_mask: tuple[str, np.ndarray | None] = ('', None)
 
         self._open = True
 
@@ -104,9 +192,12 @@ class AutoFisherGUI:
         self._root.title(AutoFisherGUI._TITLE)
         self._root.protocol('WM_DELETE_WINDOW', lambda *_: setattr(self, '_open', False))
         self._root.bind(f'<{AutoFisherGUI._SET_POSITION_HOTKEY}>', lambda *_: self._update_screen_xy())
+        self._root.bind(f'<{AutoFisherGUI._ADD_REGION_HOTKEY}>', lambda *_: self._add_extra_region())
+        self._root.bind(f'<{AutoFisherGUI._CAPTURE_TEMPLATE_HOTKEY}>', lambda *_: self._capture_bobber_template())
 
         self._configure_layout()
         self._preset_selection_changed()
+        self._previews_shown_changed()
 
     def __enter__(self) -> None:
         pass
@@ -121,22 +212,80 @@ class AutoFisherGUI:
         preview_frame = tk.LabelFrame(root)
         preview_frame.grid(column=0, row=0, sticky=tk.NS)
         row = 0
-        tk.Label(preview_frame, text='Detection region').grid(column=0, row=row, sticky=tk.EW)
-        row += 1
-        self._region_preview = tk.Label(preview_frame)
-        self._region_preview.grid(column=0, row=row)
-        row += 1
-        tk.Label(preview_frame, text='Frame difference').grid(column=0, row=row, sticky=tk.EW)
+        tk.Checkbutton(
+            preview_frame,
+            text='Show previews',
+            variable=self._previews_shown,
+            onvalue=True,
+            offvalue=False,
+            command=self._previews_shown_changed
+        ).grid(column=0, row=row, sticky=tk.EW)
         row += 1
-        self._difference_preview = tk.Label(preview_frame)
-        self._difference_preview.grid(column=0, row=row)
+        # Collapsible part, the numbers below stay visible
+        self._previews = tk.Frame(preview_frame)
+        self._previews.grid(column=0, row=row, sticky=tk.EW)
+        self._previews.columnconfigure(index=0, weight=1)
+        previews_row = 0
+        tk.Label(self._previews, text='Detection region').grid(column=0, row=previews_row, sticky=tk.EW)
+        previews_row += 1
+        self._region_preview = tk.Label(self._previews)
+        self._region_preview.grid(column=0, row=previews_row)
+        self._region_preview.bind('<Button-1>', lambda event: self._paint_mask(event, inside=False))
+        self._region_preview.bind('<B1-Motion>', lambda event: self._paint_mask(event, inside=False))
+        self._region_preview.bind('<Button-3>', lambda event: self._paint_mask(event, inside=True))
+        self._region_preview.bind('<B3-Motion>', lambda event: self._paint_mask(event, inside=True))
+        previews_row += 1
+        tk.Label(self._previews, text='Paint to ignore (left) or watch (right)') \
+            .grid(column=0, row=previews_row, sticky=tk.EW)
+        previews_row += 1
+        tk.Label(self._previews, text='Frame difference').grid(column=0, row=previews_row, sticky=tk.EW)
+        previews_row += 1
+        self._difference_preview = tk.Label(self._previews)
+        self._difference_preview.grid(column=0, row=previews_row)
+        previews_row += 1
+        tk.Checkbutton(
+            self._previews,
+            text='Noise heatmap',
+            variable=self._heatmap_enabled,
+            onvalue=True,
+            offvalue=False,
+            command=lambda: _clear_image(self._heatmap_preview)
+        ).grid(column=0, row=previews_row, sticky=tk.EW)
+        previews_row += 1
+        self._heatmap_preview = tk.Label(self._previews)
+        self._heatmap_preview.grid(column=0, row=previews_row)
+        previews_row += 1
+        heatmap_controls_frame = tk.Frame(self._previews)
+        heatmap_controls_frame.grid(column=0, row=previews_row, sticky=tk.EW)
+        heatmap_controls_frame.columnconfigure(index=0, weight=1)
+        heatmap_controls_frame.columnconfigure(index=1, weight=1)
+        tk.Button(heatmap_controls_frame, text='Export', command=self._export_statistics) \
+            .grid(column=0, row=0, sticky=tk.NSEW)
+        tk.Button(heatmap_controls_frame, text='Use as mask', command=self._on_statistics_to_mask) \
+            .grid(column=1, row=0, sticky=tk.NSEW)
+        del heatmap_controls_frame, previews_row
         row += 1
         self._difference = tk.Label(preview_frame)
         self._difference.grid(column=0, row=row, sticky=tk.EW)
         row += 1
         self._motion_detected = tk.Label(preview_frame)
         self._motion_detected.grid(column=0, row=row, sticky=tk.EW)
-        del preview_frame
+        row += 1
+        self._fps = tk.Label(preview_frame)
+        self._fps.grid(column=0, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(preview_frame, text='Stage timings p50 / p95 / p99').grid(column=0, row=row, sticky=tk.EW)
+        row += 1
+        self._metrics = tk.Label(preview_frame, justify=tk.LEFT)
+        self._metrics.grid(column=0, row=row, sticky=tk.W)
+        row += 1
+        session_frame = tk.LabelFrame(preview_frame, text='Session')
+        session_frame.grid(column=0, row=row, sticky=tk.EW)
+        session_frame.columnconfigure(index=0, weight=1)
+        self._session = tk.Label(session_frame, justify=tk.LEFT)
+        self._session.grid(column=0, row=0, sticky=tk.W)
+        tk.Button(session_frame, text='Export', command=self._export_session).grid(column=0, row=1, sticky=tk.EW)
+        del session_frame, preview_frame
         # endregion
 
         settings_and_controls_frame = tk.LabelFrame(root)
@@ -175,6 +324,69 @@ class AutoFisherGUI:
             state='readonly'
         ).grid(column=1, row=row, sticky=tk.EW)
         row += 1
+        tk.Label(settings_frame, text='Width').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.region_width,
+            from_=Preset.MIN_REGION_SIZE,
+            to=Preset.MAX_REGION_SIZE,
+            width=10,
+            increment=4,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Height').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.region_height,
+            from_=Preset.MIN_REGION_SIZE,
+            to=Preset.MAX_REGION_SIZE,
+            width=10,
+            increment=4,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Track bobber').grid(column=0, row=row, sticky=tk.E)
+        tk.Checkbutton(
+            settings_frame,
+            variable=self._view_model.adaptive_region,
+            onvalue=True,
+            offvalue=False
+        ).grid(column=1, row=row, sticky=tk.W)
+        row += 1
+        tk.Label(settings_frame, text='Tracking size').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.tracking_size,
+            from_=RegionTracker.TRACKING_SIZE_MIN,
+            to=RegionTracker.TRACKING_SIZE_MAX,
+            width=10,
+            increment=4,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text=f'Use [{AutoFisherGUI._CAPTURE_TEMPLATE_HOTKEY}] to capture the bobber under mouse') \
+            .grid(columnspan=2, row=row, sticky=tk.EW)
+        row += 1
+        self._bobber_template = tk.Label(settings_frame)
+        self._bobber_template.grid(column=0, row=row, sticky=tk.E)
+        tk.Button(
+            settings_frame,
+            text='Clear',
+            command=lambda: self._view_model.bobber_template.set('')
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text=f'Use [{AutoFisherGUI._ADD_REGION_HOTKEY}] to add a region at mouse position') \
+            .grid(columnspan=2, row=row, sticky=tk.EW)
+        row += 1
+        self._extra_regions = tk.Label(settings_frame)
+        self._extra_regions.grid(column=0, row=row, sticky=tk.E)
+        tk.Button(
+            settings_frame,
+            text='Clear',
+            command=lambda: self._view_model.extra_regions.set([])
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
         tk.Label(settings_frame, text='Motion detection settings').grid(columnspan=2, row=row, sticky=tk.EW)
         row += 1
         tk.Label(settings_frame, text='Binarization threshold').grid(column=0, row=row, sticky=tk.E)
@@ -207,6 +419,80 @@ class AutoFisherGUI:
             state='readonly'
         ).grid(column=1, row=row, sticky=tk.EW)
         row += 1
+        tk.Label(settings_frame, text='Detection mode').grid(column=0, row=row, sticky=tk.E)
+        ttk.Combobox(
+            settings_frame,
+            textvariable=self._view_model.detection_mode,
+            values=[mode.value for mode in DetectionMode],
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Frame history').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.history_depth,
+            from_=MotionDetector.HISTORY_DEPTH_MIN,
+            to=MotionDetector.HISTORY_DEPTH_MAX,
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Background learning rate').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.learning_rate,
+            from_=MotionDetector.LEARNING_RATE_MIN,
+            to=MotionDetector.LEARNING_RATE_MAX,
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Blur kernel (0 = auto)').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.blur_kernel_size,
+            values=[0, *range(3, MotionDetector.BLUR_KERNEL_SIZE_MAX + 1, 2)],
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Blur').grid(column=0, row=row, sticky=tk.E)
+        ttk.Combobox(
+            settings_frame,
+            textvariable=self._view_model.blur_mode,
+            values=[blur_mode.value for blur_mode in BlurMode],
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Preprocessing').grid(column=0, row=row, sticky=tk.E)
+        ttk.Combobox(
+            settings_frame,
+            textvariable=self._view_model.preprocess_pipeline,
+            values=[pipeline.value for pipeline in PreprocessPipeline],
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Skip static frames').grid(column=0, row=row, sticky=tk.E)
+        tk.Checkbutton(
+            settings_frame,
+            variable=self._view_model.skip_static_frames,
+            onvalue=True,
+            offvalue=False
+        ).grid(column=1, row=row, sticky=tk.W)
+        row += 1
+        tk.Label(settings_frame, text='Static tolerance').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.static_tolerance,
+            from_=MotionDetector.STATIC_TOLERANCE_MIN,
+            to=MotionDetector.STATIC_TOLERANCE_MAX,
+            width=10,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
         tk.Label(settings_frame, text='Use buffs').grid(column=0, row=row, sticky=tk.E)
         tk.Checkbutton(
             settings_frame,
@@ -225,6 +511,17 @@ class AutoFisherGUI:
             increment=5,
             state='readonly'
         ).grid(column=1, row=row, sticky=tk.EW)
+        row += 1
+        tk.Label(settings_frame, text='Target FPS').grid(column=0, row=row, sticky=tk.E)
+        tk.Spinbox(
+            settings_frame,
+            textvariable=self._view_model.target_fps,
+            from_=FramePacer.TARGET_FPS_MIN,
+            to=FramePacer.TARGET_FPS_MAX,
+            width=10,
+            increment=5,
+            state='readonly'
+        ).grid(column=1, row=row, sticky=tk.EW)
         del settings_frame
         # endregion
 
@@ -251,6 +548,14 @@ class AutoFisherGUI:
         self._delete_preset_button = tk.Button(controls_frame, text='Delete', command=self._delete_preset)
         self._delete_preset_button.grid(column=1, row=row, sticky=tk.NSEW)
         row += 1
+        self._calibrate_button = tk.Button(controls_frame, text='Calibrate', command=self._on_calibrate)
+        self._calibrate_button.grid(columnspan=2, row=row, sticky=tk.EW)
+        row += 1
+        tk.Button(controls_frame, text='Learn mask', command=self._on_learn_mask) \
+            .grid(column=0, row=row, sticky=tk.NSEW)
+        tk.Button(controls_frame, text='Clear mask', command=lambda: self._view_model.roi_mask.set('')) \
+            .grid(column=1, row=row, sticky=tk.NSEW)
+        row += 1
         self._start_button = tk.Button(controls_frame, text='Start Fishing')
 
         def on_start() -> None:
@@ -278,7 +583,79 @@ class AutoFisherGUI:
         self._view_model.screen_x.set(x)
         self._view_model.screen_y.set(y)
 
+    def _capture_bobber_template(self) -> None:
+        x, y = pg.position()
+        size = BobberLocator.TEMPLATE_SIZE
+        image = np.array(pg.screenshot(region=(x - size // 2, y - size // 2, size, size)))
+        # Same conversion the detection applies to captured RGB frames
+        self._view_model.bobber_template.set(encode_template(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)))
+
+    def _add_extra_region(self) -> None:
+        x, y = pg.position()
+        self._view_model.extra_regions.set(self._view_model.extra_regions.get() + [[x, y]])
+
+    def _export_statistics(self) -> None:
+        path = filedialog.asksaveasfilename(
+            parent=self._root,
+            defaultextension='.npz',
+            filetypes=[('Mean and variance', '*.npz'), ('Heatmap', '*.png')]
+        )
+        if path:
+            self._on_export_statistics(path)
+
+    def _export_session(self) -> None:
+        path = filedialog.asksaveasfilename(
+            parent=self._root,
+            defaultextension='.json',
+            filetypes=[('Summary and buckets', '*.json'), ('Buckets', '*.csv')]
+        )
+        if path:
+            self._on_export_session(path)
+
+    def _mask(self) -> np.ndarray | None:
+        encoded = self._view_model.roi_mask.get()
+        if encoded != self._decoded_mask[0]:
+            self._decoded_mask = (encoded, decode_mask(encoded))
+
+        return self._decoded_mask[1]
+
+    def _shows_full_region(self) -> bool:
+        """
+        @return: whether the region preview shows the whole configured region, which the mask is painted over.
+        """
+        region_shape = (self._view_model.region_height.get(), self._view_model.region_width.get())
+
+        return self._region_preview_shape == region_shape and not self._view_model.extra_regions.get()
+
+    def _paint_mask(self, event: tk.Event, inside: bool) -> None:
+        if not self._shows_full_region():
+            return
+
+        height, width = self._region_preview_shape
+        mask = self._mask()
+        mask = np.full((height, width), 255, dtype=np.uint8) if mask is None else fit_mask(mask, height, width).copy()
+
+        # The image is centered in the label, which may be larger than it
+        x = event.x - (self._region_preview.winfo_width() - width) // 2
+        y = event.y - (self._region_preview.winfo_height() - height) // 2
+
+        cv2.circle(mask, (x, y), AutoFisherGUI._MASK_BRUSH_RADIUS, 255 if inside else 0, thickness=-1)
+        self._view_model.roi_mask.set(encode_mask(mask))
+
+    def _previews_shown_changed(self) -> None:
+        shown = self._previews_shown.get()
+        self._preferences.set(previews_shown=shown)
+
+        if shown:
+            self._previews.grid()
+        else:
+            self._previews.grid_remove()
+
     def _on_update(self) -> None:
+        self._extra_regions.configure(text=f'Extra regions: {len(self._view_model.extra_regions.get())}')
+        template_captured = 'captured' if self._view_model.bobber_template.get() else 'none'
+        self._bobber_template.configure(text=f'Bobber template: {template_captured}')
+
         can_delete_preset = \
             len(self._presets) > 1 \
             and self._view_model.name.get() != Preset.DEFAULT_NAME \
@@ -290,7 +667,7 @@ class AutoFisherGUI:
 
     # region preset selection
     def _preset_selection_changed(self) -> None:
-        _save_preferences(preset_name=self._selected.get())
+        self._preferences.set(preset_name=self._selected.get())
         self._view_model.bind(self._presets[self._selected.get()])
 
     def _save_preset(self) -> None:
@@ -299,7 +676,27 @@ class AutoFisherGUI:
         self._presets[preset.name] = preset
         self._presets_dropdown.configure(values=list(self._presets.keys()))
         self._view_model.save()
-        _save_preferences(preset_name=preset.name)
+        self._preferences.set(preset_name=preset.name)
+
+    def add_preset(self, preset: Preset) -> None:
+        """
+        Saves the preset and selects it.
+        """
+        self._view_model.bind(preset)
+        self._save_preset()
+
+    def presets_changed(self, presets: Collection[Preset], changed: set[str]) -> None:
+        """
+        Refreshes the preset list after presets were changed on disk.
+        The selected preset is reloaded if it changed, its unsaved edits are kept if it was removed.
+
+        @param changed: names of the presets added, changed or removed.
+        """
+        self._presets = {it.name: it for it in presets}
+        self._presets_dropdown.configure(values=list(self._presets.keys()))
+
+        if self._selected.get() in changed and self._selected.get() in self._presets:
+            self._view_model.bind(self._presets[self._selected.get()])
 
     def _delete_preset(self) -> None:
         assert len(self._presets) > 1
@@ -317,8 +714,28 @@ class AutoFisherGUI:
 
     # endregion
 
+    @property
+    def heatmap_enabled(self) -> bool:
+        return self._heatmap_enabled.get()
+
+    @property
+    def previews_visible(self) -> bool:
+        """
+        Whether previews are shown: they are not collapsed and the window is neither minimized nor withdrawn.
+        """
+        return self._previews_shown.get() and self._root.state() != 'iconic' and bool(self._root.winfo_viewable())
+
     # region set-only properties
     def region_preview(self, image: np.ndarray) -> None:
+        self._region_preview_shape = image.shape[:2]
+
+        mask = self._mask()
+        if mask is not None and self._shows_full_region():
+            height, width = self._region_preview_shape
+            outside = fit_mask(mask, height, width) == 0
+            image = image.copy()
+            image[outside] = (image[outside] * AutoFisherGUI._MASKED_BRIGHTNESS).astype(np.uint8)
+
         _set_image(self._region_preview, image)
 
     region_preview = property(fset=region_preview)
@@ -328,6 +745,11 @@ class AutoFisherGUI:
 
     difference_preview = property(fset=difference_preview)
 
+    def heatmap_preview(self, image: np.ndarray) -> None:
+        _set_image(self._heatmap_preview, image)
+
+    heatmap_preview = property(fset=heatmap_preview)
+
     def motion_value(self, value: int) -> None:
         self._difference.configure(text=f'Difference: {value}')
         motion_detected = 'Yes' if value > self._view_model.difference_threshold.get() else 'No'
@@ -335,6 +757,22 @@ class AutoFisherGUI:
 
     motion_value = property(fset=motion_value)
 
+    def fps(self, value: tuple[float, int]) -> None:
+        achieved, dropped = value
+        self._fps.configure(text=f'FPS: {achieved:.0f} (dropped: {dropped})')
+
+    fps = property(fset=fps)
+
+    def metrics(self, value: str) -> None:
+        self._metrics.configure(text=value)
+
+    metrics = property(fset=metrics)
+
+    def session(self, value: str) -> None:
+        self._session.configure(text=value)
+
+    session = property(fset=session)
+
     def game_active(self, value: bool) -> None:
         self._game_active = value
 
@@ -375,26 +813,22 @@ class AutoFisherGUI:
 
 
 def _set_image(label: tk.Label, image: np.ndarray) -> None:
+    """
+    Pastes into the label's current photo image, only allocating a new one when the size or color mode changes.
+    """
     image = Image.fromarray(image)
-    image = ImageTk.PhotoImage(image)
-
-    label.configure(image=image)
-    label.image = image
-
-
-_PREFERENCES_FILE = 'preferences.json'
-
+    photo = getattr(label, 'image', None)
 
-def _save_preferences(**kwargs) -> None:
-    preferences = _load_preferences()
+    if photo is not None and label.image_format == (image.mode, image.size):
+        photo.paste(image)
+        return
 
-    with open(_PREFERENCES_FILE, mode='w', encoding='utf-8') as preferences_file:
-        json.dump(preferences | kwargs, preferences_file, indent=4)
+    photo = ImageTk.PhotoImage(image)
+    label.configure(image=photo)
+    label.image = photo
+    label.image_format = (image.mode, image.size)
 
 
-def _load_preferences() -> dict[str, Any]:
-    try:
-        with open(_PREFERENCES_FILE, mode='r', encoding='utf-8') as preferences_file:
-            return json.load(preferences_file)
-    except FileNotFoundError:
-        return {}
+def _clear_image(label: tk.Label) -> None:
+    label.configure(image='')
+    label.image = None
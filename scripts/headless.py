@@ -0,0 +1,245 @@
+"""
+Runs the fishing loop without a window: no Tk is imported and nothing is drawn.
+
+Loads a saved preset by name, fishes until interrupted or `--duration` runs out and logs state
+transitions, status changes, periodic metrics and session statistics to stdout and, with `--log`, to a file.
+
+    $> python scripts/headless.py --preset Default --metrics metrics.csv
+
+`--replay` feeds a recording (see `replay.py`) instead of the screen and records input instead of
+sending it, so the whole loop runs on any OS, e.g. on a server:
+
+    $> python scripts/headless.py --preset Default --replay session.frames
+"""
+import argparse
+import dataclasses
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from detection_worker import DetectionWorker
+from input_dispatcher import InputBackend, InputDispatcher, MockInputBackend, Win32InputBackend
+from metrics import Metrics, MetricsWriter, format_snapshot
+from preset import Preset
+from preset_store import PRESETS_DIR, PresetStore, open_backend
+from session_stats import SessionStatistics, format_session
+from statemachine import TransitionEvent, TransitionKind
+
+__all__ = [
+    'HeadlessFishingBot'
+]
+
+GAME_WINDOW_TITLE = 'Terraria'
+# How often reports of the worker are checked for status changes
+POLL_PERIOD = 0.25
+LOG_METRICS_PERIOD_DEFAULT = 60.0
+
+_logger = logging.getLogger('auto_fisher')
+
+
+class HeadlessFishingBot:
+    """
+    Same loop as `main.FishingBot` with status and metrics logged instead of shown.
+    """
+
+    def __init__(
+            self,
+            preset: Preset,
+            grab: Callable[[tuple[int, int, int, int]], Any],
+            is_game_active: Callable[[], bool],
+            input_backend: InputBackend,
+            grab_gray: Callable[[tuple[int, int, int, int]], Any] | None = None,
+            activate_game: Callable[[], None] | None = None,
+            metrics_writer: MetricsWriter | None = None,
+            log_metrics_period: float = LOG_METRICS_PERIOD_DEFAULT,
+            session_path: str | Path | None = None
+    ) -> None:
+        """
+        @param activate_game: brings the game window to the foreground before fishing starts.
+        @param session_path: where to export the session statistics on stop, see `SessionStatistics.save`.
+        """
+        self._activate_game = activate_game
+        self._metrics_writer = metrics_writer
+        self._session_path = session_path
+        self._log_metrics_period = log_metrics_period
+
+        self._input = InputDispatcher(input_backend)
+        self._worker = DetectionWorker(
+            preset=preset,
+            grab=grab,
+            grab_gray=grab_gray,
+            is_game_active=is_game_active,
+            click=self._input.click,
+            press=self._input.press
+        )
+        self._worker.previews_enabled = False
+        self._worker.state_machine.subscribe(_log_transition)
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._worker.metrics
+
+    @property
+    def session_statistics(self) -> SessionStatistics:
+        return self._worker.session_statistics
+
+    def run(self, duration: float | None = None) -> None:
+        """
+        Fishes until interrupted, or for `duration` seconds.
+
+        @raise EOFError: when a replayed recording runs out.
+        """
+        worker = self._worker
+        metrics = worker.metrics
+
+        end = None if duration is None else time.time() + duration
+        last_metrics_time = time.time()
+        game_active: bool | None = None
+        status: str | None = None
+
+        self._input.start()
+        worker.start()
+        try:
+            if self._activate_game is not None:
+                self._activate_game()
+            worker.start_fishing()
+            _logger.info('Fishing with preset %r', worker.preset.name)
+
+            while end is None or time.time() < end:
+                worker.raise_if_failed()
+
+                report = worker.reports.take()
+                if report is not None:
+                    if report.game_active != game_active:
+                        game_active = report.game_active
+                        _logger.info('Game %s', 'active' if game_active else 'inactive, paused')
+                    if report.status is not None and report.status != status:
+                        status = report.status
+                        _logger.debug('Status: %s', status)
+
+                now = time.time()
+                if now - last_metrics_time >= self._log_metrics_period:
+                    _logger.info('Metrics:\n%s', format_snapshot(metrics.snapshot()))
+                    _logger.info('Session:\n%s', format_session(self.session_statistics.snapshot()))
+                    last_metrics_time = now
+
+                if self._metrics_writer is not None:
+                    self._metrics_writer.maybe_flush(metrics)
+
+                time.sleep(POLL_PERIOD)
+        finally:
+            worker.stop()
+            self._input.stop()
+
+            _logger.info('Stopped, metrics:\n%s', format_snapshot(metrics.snapshot()))
+            if self._metrics_writer is not None:
+                self._metrics_writer.flush(metrics)
+
+            _logger.info('Session:\n%s', format_session(self.session_statistics.snapshot()))
+            if self._session_path is not None:
+                self.session_statistics.save(self._session_path)
+
+
+def _log_transition(event: TransitionEvent) -> None:
+    if event.kind == TransitionKind.REEL_IN_ISSUED:
+        _logger.info('Reel in, %.0f ms after the bite', event.latency * 1_000)
+    elif event.kind == TransitionKind.CAST_ISSUED:
+        _logger.info('Cast')
+    else:
+        _logger.debug('%s', event.kind.value)
+
+
+def _configure_logging(log_path: str | None, verbose: bool) -> None:
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
+    if log_path is not None:
+        handlers.append(logging.FileHandler(log_path, encoding='utf-8'))
+
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.INFO,
+        format='%(asctime)s %(levelname)s %(message)s',
+        handlers=handlers
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', default=Preset.DEFAULT_NAME, help='name of a saved preset')
+    parser.add_argument('--presets', metavar='PATH', default=str(PRESETS_DIR),
+                        help='preset directory, or a .jsonl file keeping all presets in one file')
+    parser.add_argument('--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--fps', type=int, help='override the target FPS of the preset')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='detect on a recording of raw frames and record input instead of sending it')
+    parser.add_argument('--log', metavar='PATH', help='also append the log to PATH')
+    parser.add_argument('--verbose', action='store_true', help='also log every status change and transition')
+    parser.add_argument(
+        '--metrics',
+        metavar='PATH',
+        help='periodically write pipeline metrics to PATH, one row per flush for .csv, latest snapshot for .json'
+    )
+    parser.add_argument('--metrics-period', type=float, default=LOG_METRICS_PERIOD_DEFAULT,
+                        help='seconds between metrics written to the log')
+    parser.add_argument(
+        '--session',
+        metavar='PATH',
+        help='export session statistics to PATH on stop, per-minute buckets for .csv, summary and buckets for .json'
+    )
+    args = parser.parse_args()
+
+    _configure_logging(args.log, args.verbose)
+
+    preset = PresetStore(open_backend(args.presets)).get(args.preset)
+    if preset is None:
+        _logger.error('Preset %r not found', args.preset)
+        return
+
+    if args.fps is not None:
+        preset = dataclasses.replace(preset, target_fps=args.fps)
+
+    metrics_writer = MetricsWriter(args.metrics) if args.metrics else None
+
+    if args.replay:
+        from frame_source import ReplayFrameSource
+
+        frame_source = ReplayFrameSource(args.replay, loop=False)
+        bot = HeadlessFishingBot(
+            preset,
+            grab=frame_source.grab,
+            is_game_active=lambda: True,
+            input_backend=MockInputBackend(),
+            metrics_writer=metrics_writer,
+            log_metrics_period=args.metrics_period,
+            session_path=args.session
+        )
+    else:
+        # Screen capture and window lookup need Windows, a replay does not
+        import interaction
+
+        window = interaction.find_window(lambda title: title.startswith(f'{GAME_WINDOW_TITLE}:'))
+        if window is None:
+            _logger.error('Game window not found. Please launch %s first.', GAME_WINDOW_TITLE)
+            return
+
+        bot = HeadlessFishingBot(
+            preset,
+            grab=interaction.screenshot,
+            grab_gray=interaction.screenshot_gray,
+            is_game_active=lambda: f'{GAME_WINDOW_TITLE}:' in interaction.active_window_title(),
+            input_backend=Win32InputBackend(),
+            activate_game=lambda: interaction.switch_window(window),
+            metrics_writer=metrics_writer,
+            log_metrics_period=args.metrics_period,
+            session_path=args.session
+        )
+
+    try:
+        bot.run(duration=args.duration)
+    except KeyboardInterrupt:
+        pass
+    except EOFError:
+        _logger.info('Replay finished')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+__all__ = [
+    'InputBackend',
+    'Win32InputBackend',
+    'MockInputBackend',
+    'InputDispatcher'
+]
+
+
+class InputBackend:
+    def move_mouse(self, position: tuple[int, int]) -> None:
+        raise NotImplementedError()
+
+    def mouse_down(self) -> None:
+        raise NotImplementedError()
+
+    def mouse_up(self) -> None:
+        raise NotImplementedError()
+
+    def key_down(self, key: str) -> None:
+        raise NotImplementedError()
+
+    def key_up(self, key: str) -> None:
+        raise NotImplementedError()
+
+
+class Win32InputBackend(InputBackend):
+    def __init__(self) -> None:
+        import interaction
+
+        self._interaction = interaction
+
+    def move_mouse(self, position: tuple[int, int]) -> None:
+        self._interaction.move_mouse(position)
+
+    def mouse_down(self) -> None:
+        self._interaction.mouse_down()
+
+    def mouse_up(self) -> None:
+        self._interaction.mouse_up()
+
+    def key_down(self, key: str) -> None:
+        self._interaction.key_down(key)
+
+    def key_up(self, key: str) -> None:
+        self._interaction.key_up(key)
+
+
+class MockInputBackend(InputBackend):
+    """
+    Records input as (timestamp, action, argument) tuples instead of sending it.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._events: list[tuple[float, str, object]] = []
+
+    @property
+    def events(self) -> list[tuple[float, str, object]]:
+        with self._lock:
+            return list(self._events)
+
+    def _record(self, action: str, argument: object = None) -> None:
+        with self._lock:
+            self._events.append((self._clock(), action, argument))
+
+    def move_mouse(self, position: tuple[int, int]) -> None:
+        self._record('move_mouse', position)
+
+    def mouse_down(self) -> None:
+        self._record('mouse_down')
+
+    def mouse_up(self) -> None:
+        self._record('mouse_up')
+
+    def key_down(self, key: str) -> None:
+        self._record('key_down', key)
+
+    def key_up(self, key: str) -> None:
+        self._record('key_up', key)
+
+
+_MOUSE = object()
+
+
+class InputDispatcher:
+    """
+    Sends input from a dedicated thread so callers never wait for a button to be released.
+
+    `click` and `press` schedule the down event now and the up event `release_delay` seconds later,
+    then return immediately. A button or key that is still held delays the next press of the same
+    button until it has been released.
+    """
+
+    RELEASE_DELAY_DEFAULT = 0.1
+
+    def __init__(self, backend: InputBackend, clock: Callable[[], float] = time.perf_counter) -> None:
+        self._backend = backend
+        self._clock = clock
+
+        self._queue: list[tuple[float, int, Callable[..., None], tuple]] = []
+        self._sequence = itertools.count()
+        # Time at which each held button or key is released
+        self._released_at: dict[object, float] = {}
+
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='InputDispatcher', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Sends everything still scheduled, releasing held buttons, and stops the dispatch thread.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def click(self, position: tuple[int, int] | None = None, release_delay: float = RELEASE_DELAY_DEFAULT) -> None:
+        backend = self._backend
+
+        with self._condition:
+            start = self._press_start(_MOUSE)
+            if position is not None:
+                self._schedule(start, backend.move_mouse, position)
+            self._schedule(start, backend.mouse_down)
+            self._schedule(start + release_delay, backend.mouse_up)
+            self._released_at[_MOUSE] = start + release_delay
+
+    def press(self, key: str, release_delay: float = RELEASE_DELAY_DEFAULT) -> None:
+        backend = self._backend
+
+        with self._condition:
+            start = self._press_start(key)
+            self._schedule(start, backend.key_down, key)
+            self._schedule(start + release_delay, backend.key_up, key)
+            self._released_at[key] = start + release_delay
+
+    def _press_start(self, button: object) -> float:
+        return max(self._clock(), self._released_at.get(button, 0.0))
+
+    def _schedule(self, due: float, action: Callable[..., None], *args) -> None:
+        heapq.heappush(self._queue, (due, next(self._sequence), action, args))
+        self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if not self._queue:
+                        if self._stopped:
+                            return
+                        self._condition.wait()
+                        continue
+
+                    remaining = self._queue[0][0] - self._clock()
+                    if remaining <= 0 or self._stopped:
+                        break
+
+                    self._condition.wait(timeout=remaining)
+
+                _, _, action, args = heapq.heappop(self._queue)
+
+            action(*args)
@@ -2,19 +2,30 @@ import time
 from typing import Callable, Any
 
 import numpy as np
-import pyautogui as pg
 import win32api
 import win32con
 import win32gui
 
+from frame_source import FrameSource, GdiFrameSource
+from lazy_import import lazy_module
+
+pg = lazy_module('pyautogui')
+
 __all__ = [
     'click',
+    'mouse_down',
+    'mouse_up',
     'press',
+    'key_down',
+    'key_up',
+    'key_pressed',
     'find_window',
     'active_window_title',
     'switch_window',
     'move_mouse',
-    'screenshot'
+    'screenshot',
+    'screenshot_gray',
+    'set_frame_source'
 ]
 
 
@@ -49,12 +60,23 @@ def move_mouse(position: tuple[int, int]) -> None:
 _BUTTON_RELEASE_DELAY = 0.1
 
 
-def click(release_delay=_BUTTON_RELEASE_DELAY) -> None:
+def mouse_down() -> None:
     win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0)
+
+
+def mouse_up() -> None:
+    win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0)
+
+
+def click(release_delay=_BUTTON_RELEASE_DELAY) -> None:
+    """
+    Blocks for `release_delay`, see `input_dispatcher` for the non-blocking alternative.
+    """
+    mouse_down()
     try:
         time.sleep(release_delay)
     finally:
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0)
+        mouse_up()
 
 
 _KEY_CODE = {
@@ -206,17 +228,62 @@ _KEY_CODE = {
 }
 
 
-def press(key: str, release_delay=_BUTTON_RELEASE_DELAY) -> None:
+def key_down(key: str) -> None:
     pg.keyDown(key)
+
+
+def key_up(key: str) -> None:
+    pg.keyUp(key)
+
+
+def press(key: str, release_delay=_BUTTON_RELEASE_DELAY) -> None:
+    """
+    Blocks for `release_delay`, see `input_dispatcher` for the non-blocking alternative.
+    """
+    key_down(key)
     try:
         time.sleep(release_delay)
     finally:
-        pg.keyUp(key)
+        key_up(key)
+
+
+_frame_source: FrameSource | None = None
+
+
+def set_frame_source(frame_source: FrameSource) -> None:
+    global _frame_source
+
+    if _frame_source is not None and _frame_source is not frame_source:
+        _frame_source.close()
+
+    _frame_source = frame_source
+
+
+def key_pressed(key: str) -> bool:
+    """
+    @return: whether the key is currently held down, regardless of which window has focus.
+    """
+    return bool(win32api.GetAsyncKeyState(_KEY_CODE[key]) & 0x8000)
 
 
 def screenshot(region: tuple[int, int, int, int]) -> np.ndarray:
     """
     @param region: (left, top, width, height).
+    @return: RGB frame. May share memory with the previous frame, copy it to keep it.
+    """
+
+    if _frame_source is None:
+        set_frame_source(GdiFrameSource())
+
+    return _frame_source.grab(region)
+
+
+def screenshot_gray(region: tuple[int, int, int, int]) -> np.ndarray:
     """
+    Same as `screenshot`, converted to grayscale while capturing where the frame source supports it.
+    """
+
+    if _frame_source is None:
+        set_frame_source(GdiFrameSource())
 
-    return np.array(pg.screenshot(region=region))
+    return _frame_source.grab_gray(region)
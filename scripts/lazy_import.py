@@ -0,0 +1,31 @@
+import importlib
+import sys
+from types import ModuleType
+
+__all__ = [
+    'LazyModule',
+    'lazy_module'
+]
+
+
+class LazyModule(ModuleType):
+    """
+    Stands in for a module that is only imported when one of its attributes is first used.
+
+    The attributes of the imported module are then copied onto the stand-in, so later lookups
+    cost the same as on the module itself.
+    """
+
+    def __getattr__(self, name: str) -> object:
+        # Only reached for attributes that are not copied yet, that is until the import
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+
+        return getattr(module, name)
+
+
+def lazy_module(name: str) -> ModuleType:
+    """
+    @return: the module if it has already been imported, a `LazyModule` importing it on first use otherwise.
+    """
+    return sys.modules.get(name) or LazyModule(name)
@@ -1,94 +1,247 @@
+import argparse
 import time
 from tkinter import messagebox
-from typing import Any
+from typing import Any, Callable
 
+from detection_worker import DetectionWorker, DetectionReport, MASK_DEVIATION_RATIO, PreviewImages
+from frame_pacer import FramePacer
 from gui import AutoFisherGUI, PresetViewModel
-from interaction import find_window, switch_window, click, screenshot, move_mouse, active_window_title, press
-from motion_detector import MotionDetector
-from preset import Preset
-from statemachine import FishingStateMachine
-
-SIZE = 92
+from input_dispatcher import InputDispatcher, Win32InputBackend
+from interaction import find_window, switch_window, screenshot, screenshot_gray, active_window_title, key_pressed
+from metrics import Metrics, MetricsWriter, format_snapshot
+from pixel_statistics import PixelStatistics
+from preset_store import PRESETS_DIR, Preferences, PresetBackend, PresetStore, open_backend
+from recording import FrameRecorder
+from roi_mask import encode_mask, mask_from_variance
+from session_stats import format_session
 
 GAME_WINDOW_TITLE = 'Terraria'
-BUFF_HOTKEY = 'b'
+GUI_FPS = 15
+CALIBRATION_DURATION = 15
+MASK_LEARNING_DURATION = 30
+METRICS_PERIOD = 1.0
+# Noise statistics of fewer frames are not exported or turned into a mask, about a second at the default frame rate
+STATISTICS_MIN_FRAMES = 60
+BITE_MARKER_KEY = 'F9'
+
+
+def _is_game_active() -> bool:
+    return f'{GAME_WINDOW_TITLE}:' in active_window_title()
 
 
 class FishingBot:
-    def __init__(self, terraria_window: Any) -> None:
+    def __init__(
+            self,
+            terraria_window: Any,
+            recorder: FrameRecorder | None = None,
+            metrics_writer: MetricsWriter | None = None,
+            preset_backend: PresetBackend | None = None
+    ) -> None:
         self._terraria_window = terraria_window
-        self._running = False
-
-        self._motion_detector = MotionDetector()
-        self._state_machine = FishingStateMachine(cast=self._click, reel_in=self._click)
-        self._preset = PresetViewModel(on_save=Preset.save, on_delete=Preset.delete)
+        self._metrics_writer = metrics_writer
+        self._last_metrics_time = 0.0
+        # Applied to the next noise statistics snapshot from the worker
+        self._statistics_action: Callable[[PixelStatistics], None] | None = None
+
+        self._input = InputDispatcher(Win32InputBackend())
+        self._gui_pacer = FramePacer(target_fps=GUI_FPS)
+        self._presets = PresetStore(preset_backend)
+        self._preferences = Preferences()
+        self._preset = PresetViewModel(
+            on_save=self._presets.save,
+            on_delete=lambda preset: self._presets.delete(preset.name)
+        )
         self._gui = AutoFisherGUI(
-            presets=Preset.load_all(),
+            presets=self._presets.presets(),
             view_model=self._preset,
+            preferences=self._preferences,
             on_start=self._start,
-            on_stop=self._stop
+            on_stop=self._stop,
+            on_calibrate=self._calibrate,
+            on_learn_mask=self._learn_mask,
+            on_export_statistics=self._export_statistics,
+            on_statistics_to_mask=self._statistics_to_mask,
+            on_export_session=self._export_session
+        )
+        self._worker = DetectionWorker(
+            preset=self._preset.preset,
+            grab=screenshot,
+            grab_gray=screenshot_gray,
+            is_game_active=_is_game_active,
+            click=self._input.click,
+            press=self._input.press,
+            recorder=recorder,
+            is_bite_marked=lambda: key_pressed(BITE_MARKER_KEY)
         )
-
-    def _click(self) -> None:
-        x, y = self._preset.screen_x.get(), self._preset.screen_y.get()
-        move_mouse(position=(x, y + SIZE))
-        click()
 
     def _start(self) -> None:
         time.sleep(0.1)
         switch_window(self._terraria_window)
         time.sleep(0.1)
-        self._running = True
+        self._worker.start_fishing()
 
     def _stop(self) -> None:
-        self._running = False
-        self._state_machine.reset()
+        self._worker.stop_fishing()
 
-    def run(self) -> None:
-        gui = self._gui
-        motion_detector = self._motion_detector
-        preset = self._preset
-        state_machine = self._state_machine
+    def _calibrate(self) -> None:
+        self._worker.start_calibration(CALIBRATION_DURATION)
 
-        last_buff_time = time.time()
+    def _learn_mask(self) -> None:
+        self._worker.start_mask_learning(MASK_LEARNING_DURATION)
 
-        while gui.open:
-            with gui:
-                motion_detector.frame_difference_threshold = preset.difference_threshold.get()
-                motion_detector.sensitivity = preset.sensitivity.get()
+    def _export_statistics(self, path: str) -> None:
+        self._statistics_action = lambda statistics: statistics.save(path)
+        self._worker.request_statistics()
 
-                x, y = preset.screen_x.get(), preset.screen_y.get()
-                region = (x - SIZE // 2, y - SIZE // 2, SIZE, SIZE)
+    def _export_session(self, path: str) -> None:
+        self._worker.session_statistics.save(path)
 
-                gui.region_preview = frame = screenshot(region=region)
-                gui.game_active = game_active = f'{GAME_WINDOW_TITLE}:' in active_window_title()
+    def _statistics_to_mask(self) -> None:
+        def use_as_mask(statistics: PixelStatistics) -> None:
+            max_deviation = max(self._preset.binarization_threshold.get(), 1) * MASK_DEVIATION_RATIO
+            self._preset.roi_mask.set(encode_mask(mask_from_variance(statistics.variance(), max_deviation)))
 
-                if not game_active:
-                    continue
+        self._statistics_action = use_as_mask
+        self._worker.request_statistics()
 
-                gui.difference_preview, gui.motion_value, motion_detected = motion_detector.detect(frame)
+    def run(self) -> None:
+        gui = self._gui
+        worker = self._worker
+        metrics = worker.metrics
+
+        self._input.start()
+        worker.start()
+        try:
+            while gui.open:
+                worker.raise_if_failed()
+                worker.preset = self._preset.preset
+                worker.statistics_enabled = gui.heatmap_enabled
+                worker.previews_enabled = gui.previews_visible
+
+                gui_start = time.perf_counter_ns()
+                with gui:
+                    report = worker.reports.take()
+                    if report is not None:
+                        self._show(report)
+
+                    previews = worker.previews.take()
+                    if previews is not None:
+                        self._show_previews(previews)
+
+                    calibrated = worker.calibrations.take()
+                    if calibrated is not None:
+                        gui.add_preset(calibrated)
+
+                    mask = worker.masks.take()
+                    if mask is not None:
+                        self._preset.roi_mask.set(encode_mask(mask))
+
+                    statistics = worker.statistics.take()
+                    if statistics is not None and self._statistics_action is not None:
+                        if statistics.count >= STATISTICS_MIN_FRAMES:
+                            self._statistics_action(statistics)
+                        else:
+                            messagebox.showwarning(
+                                title='Noise statistics',
+                                message='No noise statistics collected yet. '
+                                        'Check Noise heatmap with a single detection region and let it collect first.'
+                            )
+                        self._statistics_action = None
+
+                    self._show_metrics(metrics)
+
+                    changed = self._presets.update()
+                    if changed:
+                        gui.presets_changed(self._presets.presets(), changed)
+                    self._preferences.update()
+                metrics.record(Metrics.GUI, time.perf_counter_ns() - gui_start)
+
+                if self._metrics_writer is not None:
+                    self._metrics_writer.maybe_flush(metrics)
+
+                self._gui_pacer.wait()
+        finally:
+            worker.stop()
+            self._input.stop()
+            self._presets.flush()
+            self._preferences.flush()
+
+            if self._metrics_writer is not None:
+                self._metrics_writer.flush(metrics)
+
+    def _show_metrics(self, metrics: Metrics) -> None:
+        now = time.time()
+        if now - self._last_metrics_time < METRICS_PERIOD:
+            return
+
+        self._gui.metrics = format_snapshot(metrics.snapshot())
+        self._gui.session = format_session(self._worker.session_statistics.snapshot())
+        self._last_metrics_time = now
+
+    def _show(self, report: DetectionReport) -> None:
+        gui = self._gui
+
+        gui.game_active = report.game_active
+        gui.fps = report.fps, report.dropped_frames
 
-                if not self._running:
-                    continue
+        if report.motion_value is not None:
+            gui.motion_value = report.motion_value
 
-                state_machine.update(motion_detected)
-                gui.status = state_machine.state_description
+        if report.status is not None:
+            gui.status = report.status
+
+    def _show_previews(self, previews: PreviewImages) -> None:
+        gui = self._gui
 
-                buff_elapsed = time.time() - last_buff_time
-                if not preset.use_buffs.get() or buff_elapsed < preset.buff_period.get():
-                    continue
+        gui.region_preview = previews.region
 
-                press(BUFF_HOTKEY)
-                last_buff_time = time.time()
+        if previews.difference is not None:
+            gui.difference_preview = previews.difference
+
+        if previews.heatmap is not None:
+            gui.heatmap_preview = previews.heatmap
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--record',
+        metavar='PATH',
+        help=f'record captured frames to PATH for offline replay, press {BITE_MARKER_KEY} to mark bites'
+    )
+    parser.add_argument(
+        '--record-preprocessed',
+        action='store_true',
+        help='record grayscale preprocessed frames instead of raw captures, a third of the size'
+    )
+    parser.add_argument(
+        '--metrics',
+        metavar='PATH',
+        help='periodically write pipeline metrics to PATH, one row per flush for .csv, latest snapshot for .json'
+    )
+    parser.add_argument(
+        '--presets',
+        metavar='PATH',
+        default=str(PRESETS_DIR),
+        help='preset directory, or a .jsonl file keeping all presets in one file'
+    )
+    args = parser.parse_args()
+
     terraria_window = find_window(lambda title: title.startswith(f'{GAME_WINDOW_TITLE}:'))
     if terraria_window is None:
         messagebox.showerror(title=f'Error', message=f'Game window not found. Please launch {GAME_WINDOW_TITLE} first.')
         return
 
-    bot = FishingBot(terraria_window)
+    recorder = FrameRecorder(args.record, preprocessed=args.record_preprocessed) if args.record else None
+
+    metrics_writer = MetricsWriter(args.metrics) if args.metrics else None
+
+    bot = FishingBot(
+        terraria_window,
+        recorder=recorder,
+        metrics_writer=metrics_writer,
+        preset_backend=open_backend(args.presets)
+    )
     bot.run()
 
 
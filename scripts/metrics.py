@@ -0,0 +1,167 @@
+import csv
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from atomic_write import write_json
+
+__all__ = [
+    'RollingHistogram',
+    'Metrics',
+    'MetricsWriter',
+    'format_snapshot'
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+class RollingHistogram:
+    """
+    Keeps the last `window` samples in a preallocated ring buffer. Recording is O(1),
+    percentiles are only computed when asked for.
+    """
+
+    WINDOW_DEFAULT = 1_024
+
+    def __init__(self, window: int = WINDOW_DEFAULT) -> None:
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, value: float) -> None:
+        self._samples[self._next] = value
+        self._next = (self._next + 1) % len(self._samples)
+        self._count = min(self._count + 1, len(self._samples))
+
+    def percentiles(self, percentiles: tuple[int, ...] = PERCENTILES) -> dict[int, float]:
+        if self._count == 0:
+            return {p: 0.0 for p in percentiles}
+
+        values = np.percentile(self._samples[:self._count], percentiles)
+        return dict(zip(percentiles, map(float, values)))
+
+
+class Metrics:
+    """
+    Per-stage timing histograms and event counters of the fishing loop.
+
+    Stage durations are recorded in nanoseconds from `time.perf_counter_ns` and reported in microseconds.
+    Recording is cheap enough to stay on permanently: a ring buffer store per stage and a dict update per counter.
+    """
+
+    CAPTURE = 'capture'
+    PREPROCESS = 'preprocess'
+    DIFFERENCE = 'difference'
+    STATE_MACHINE = 'state_machine'
+    FRAME = 'frame'
+    GUI = 'gui'
+    # Not a stage but timed the same way: from capture of the frame motion appeared in to the reel-in click
+    BITE_TO_CLICK = 'bite_to_click'
+
+    STAGES = (CAPTURE, PREPROCESS, DIFFERENCE, STATE_MACHINE, FRAME, GUI, BITE_TO_CLICK)
+
+    CASTS = 'casts'
+    REEL_INS = 'reel_ins'
+    FALSE_POSITIVES = 'false_positives'
+    DROPPED_FRAMES = 'dropped_frames'
+    # Frames detected, of them reusing the previous preprocessed frame, and of those skipping detection too
+    FRAMES = 'frames'
+    STATIC_FRAMES = 'static_frames'
+    SKIPPED_FRAMES = 'skipped_frames'
+
+    COUNTERS = (CASTS, REEL_INS, FALSE_POSITIVES, DROPPED_FRAMES, FRAMES, STATIC_FRAMES, SKIPPED_FRAMES)
+
+    def __init__(self, window: int = RollingHistogram.WINDOW_DEFAULT) -> None:
+        self._stages = {stage: RollingHistogram(window) for stage in Metrics.STAGES}
+        self._counters = {counter: 0 for counter in Metrics.COUNTERS}
+
+    def record(self, stage: str, duration_ns: int) -> None:
+        self._stages[stage].record(duration_ns)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def set(self, counter: str, value: int) -> None:
+        self._counters[counter] = value
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        @return: {'timestamp': ..., 'counters': {name: value}, 'stages': {name: {'p50': us, ...}}, 'skip_ratio': ...}.
+        """
+        stages = {}
+        for stage, histogram in self._stages.items():
+            if len(histogram) == 0:
+                continue
+
+            stages[stage] = {f'p{p}': value / 1_000 for p, value in histogram.percentiles().items()}
+
+        frames = self._counters[Metrics.FRAMES]
+
+        return {
+            'timestamp': time.time(),
+            'counters': dict(self._counters),
+            'stages': stages,
+            'skip_ratio': self._counters[Metrics.SKIPPED_FRAMES] / frames if frames else 0.0
+        }
+
+
+def format_snapshot(snapshot: dict[str, Any]) -> str:
+    lines = [
+        f'{stage}: ' + ' / '.join(f'{value:,.0f}' for value in percentiles.values()) + ' us'
+        for stage, percentiles in snapshot['stages'].items()
+    ]
+    lines.append(', '.join(f'{name}: {value}' for name, value in snapshot['counters'].items()))
+    lines.append(f'skipped: {snapshot["skip_ratio"]:.0%}')
+
+    return '\n'.join(lines)
+
+
+class MetricsWriter:
+    """
+    Periodically writes metric snapshots to a file.
+
+    A `.csv` path gets one row appended per flush. Any other path is treated as JSON
+    and replaced with the latest snapshot on every flush.
+    """
+
+    PERIOD_DEFAULT = 5.0
+
+    def __init__(self, path: str | Path, period: float = PERIOD_DEFAULT) -> None:
+        self._path = Path(path)
+        self._period = period
+        self._last_flush = 0.0
+
+    def maybe_flush(self, metrics: Metrics) -> None:
+        now = time.time()
+        if now - self._last_flush < self._period:
+            return
+
+        self.flush(metrics)
+        self._last_flush = now
+
+    def flush(self, metrics: Metrics) -> None:
+        snapshot = metrics.snapshot()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._path.suffix == '.csv':
+            self._append_csv(snapshot)
+        else:
+            write_json(self._path, snapshot)
+
+    def _append_csv(self, snapshot: dict[str, Any]) -> None:
+        row = {'timestamp': snapshot['timestamp'], **snapshot['counters'], 'skip_ratio': snapshot['skip_ratio']}
+        for stage in Metrics.STAGES:
+            for p in PERCENTILES:
+                row[f'{stage}_p{p}_us'] = snapshot['stages'].get(stage, {}).get(f'p{p}', '')
+
+        new_file = not self._path.exists()
+        with open(self._path, mode='a', encoding='utf-8', newline='') as metrics_file:
+            writer = csv.DictWriter(metrics_file, fieldnames=list(row.keys()))
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
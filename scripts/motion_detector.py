@@ -1,29 +1,185 @@
+import functools
+from enum import Enum
 from typing import Any
 
-import cv2
 import numpy as np
 
+from lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
 
 __all__ = [
-    'MotionDetector'
+    'MotionDetector',
+    'BatchMotionDetector',
+    'DetectionMode',
+    'PreprocessPipeline',
+    'BlurMode'
 ]
 
 
 BLUR_KERNEL_SIZE = (17, 17)
+# Region size `BLUR_KERNEL_SIZE` was tuned for, automatic kernel sizes scale from it
+BLUR_REFERENCE_SIZE = 92
+
+# Linear downscale of the `DOWNSCALED` pipeline, 2 leaves a quarter of the pixels to blur and compare
+DOWNSCALE_FACTOR = 2
+
+
+class PreprocessPipeline(str, Enum):
+    FULL = 'full'
+    DOWNSCALED = 'downscaled'
+
+
+class BlurMode(str, Enum):
+    GAUSSIAN = 'gaussian'
+    # Mean over the kernel window, constant cost per pixel whatever the kernel size
+    BOX = 'box'
+
+
+@functools.lru_cache(maxsize=None)
+def _gaussian_kernel(kernel_size: int, sigma: float) -> np.ndarray:
+    """
+    @param sigma: 0 derives sigma from the kernel size, as `cv2.GaussianBlur` does.
+    @return: 1D kernel shared between callers, read-only.
+    """
+    kernel = cv2.getGaussianKernel(kernel_size, sigma, ktype=cv2.CV_32F)
+    kernel.setflags(write=False)
+
+    return kernel
+
+
+def _smooth(src: np.ndarray, kernel_size: int, sigma: float, blur_mode: BlurMode, dst: np.ndarray) -> np.ndarray:
+    if blur_mode == BlurMode.BOX:
+        return cv2.blur(src, (kernel_size, kernel_size), dst=dst)
+
+    # Several times faster than `cv2.GaussianBlur`, which rounds through a fixed-point kernel for 8-bit images,
+    # so the result can differ from it by one grey level. Not enough to flip a detection
+    kernel = _gaussian_kernel(kernel_size, sigma)
+
+    return cv2.sepFilter2D(src, -1, kernel, kernel, dst=dst, borderType=cv2.BORDER_REFLECT_101)
+
+
+def _preprocessed_shape(height: int, width: int, pipeline: 'PreprocessPipeline') -> tuple[int, int]:
+    if pipeline == PreprocessPipeline.DOWNSCALED:
+        return max(1, height // DOWNSCALE_FACTOR), max(1, width // DOWNSCALE_FACTOR)
+
+    return height, width
+
+
+def _blur(
+        gray: np.ndarray,
+        kernel_size: int,
+        pipeline: PreprocessPipeline,
+        dst: np.ndarray,
+        blur_mode: BlurMode = BlurMode.GAUSSIAN
+) -> np.ndarray:
+    """
+    @param kernel_size: odd blur kernel size at full resolution.
+    @param dst: output buffer of `_preprocessed_shape`.
+    """
+    if pipeline == PreprocessPipeline.FULL:
+        return _smooth(gray, kernel_size, 0, blur_mode, dst=dst)
+
+    # Area interpolation averages each block of pixels, which is itself a low-pass filter,
+    # so a kernel with the full resolution sigma scaled down gives an equivalent blur
+    sigma = 0.3 * ((kernel_size - 1) * 0.5 - 1) + 0.8
+    scaled_kernel_size = max(3, (kernel_size // DOWNSCALE_FACTOR) | 1)
 
+    height, width = dst.shape
+    cv2.resize(gray, (width, height), dst=dst, interpolation=cv2.INTER_AREA)
 
-def _preprocess(image: np.ndarray) -> np.ndarray:
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    image = cv2.GaussianBlur(image, BLUR_KERNEL_SIZE, 0)
+    return _smooth(dst, scaled_kernel_size, sigma / DOWNSCALE_FACTOR, blur_mode, dst=dst)
 
-    return image
+
+def _preprocess(
+        image: np.ndarray,
+        kernel_size: int = BLUR_KERNEL_SIZE[0],
+        pipeline: PreprocessPipeline = PreprocessPipeline.FULL,
+        gray: np.ndarray | None = None,
+        dst: np.ndarray | None = None,
+        blur_mode: BlurMode = BlurMode.GAUSSIAN
+) -> np.ndarray:
+    """
+    @param image: RGB frame, or a grayscale frame from a capture backend that converts while capturing.
+    @param kernel_size: odd blur kernel size at full resolution.
+    @param gray: optional scratch buffer for the grayscale conversion.
+    @param dst: optional output buffer.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+
+    if dst is None:
+        dst = np.empty(_preprocessed_shape(*image.shape[:2], pipeline), dtype=np.uint8)
+
+    return _blur(image, kernel_size, pipeline, dst=dst, blur_mode=blur_mode)
 
 
 def _clamp(value: Any, min_: Any, max_: Any) -> Any:
     return max(min_, min(max_, value))
 
 
-class MotionDetector:
+class DetectionMode(str, Enum):
+    FRAME_DIFFERENCE = 'frame_difference'
+    RUNNING_AVERAGE = 'running_average'
+
+
+class _FrameDifferenceModel:
+    """
+    Motion is the union of differences between consecutive frames over the last `depth` frames.
+
+    Frames and consecutive differences are kept in preallocated ring buffers,
+    so a new frame costs one absdiff plus an OR over the stored differences.
+    """
+
+    def __init__(self, depth: int, frame: np.ndarray) -> None:
+        height, width = frame.shape[:2]
+
+        self._frames = np.empty((depth, height, width), dtype=np.uint8)
+        self._frames[:] = frame
+        self._differences = np.zeros((depth - 1, height, width), dtype=np.uint8)
+        self._newest_frame = 0
+        self._newest_difference = 0
+
+    def update(self, frame: np.ndarray, dst: np.ndarray) -> None:
+        frames, differences = self._frames, self._differences
+        previous, self._newest_frame = self._newest_frame, (self._newest_frame + 1) % len(frames)
+        self._newest_difference = (self._newest_difference + 1) % len(differences)
+
+        np.copyto(frames[self._newest_frame], frame)
+        cv2.absdiff(frame, frames[previous], dst=differences[self._newest_difference])
+
+        np.copyto(dst, differences[0])
+        for difference in differences[1:]:
+            cv2.bitwise_or(dst, difference, dst=dst)
+
+
+class _RunningAverageModel:
+    """
+    Motion is the difference between a frame and an exponential running average of previous frames.
+
+    Short flickers barely move the average, so they score lower than with frame differencing,
+    while the bobber dipping under stands out against the settled background. O(pixels) per frame.
+    """
+
+    def __init__(self, learning_rate: float, frame: np.ndarray) -> None:
+        self._learning_rate = learning_rate
+
+        self._background = frame.astype(np.float32)
+        self._background_8u = frame.copy()
+
+    def update(self, frame: np.ndarray, dst: np.ndarray) -> None:
+        cv2.convertScaleAbs(self._background, dst=self._background_8u)
+        cv2.absdiff(frame, self._background_8u, dst=dst)
+
+        # Update after scoring so the motion being measured does not leak into its own reference
+        cv2.accumulateWeighted(frame, self._background, self._learning_rate)
+
+
+class _MotionDetectorBase:
+    """
+    Detection settings shared by the single and the batched detector.
+    """
+
     BINARIZATION_THRESHOLD_DEFAULT = 4
     BINARIZATION_THRESHOLD_MIN = 0
     BINARIZATION_THRESHOLD_MAX = 255
@@ -36,26 +192,80 @@ class MotionDetector:
     SENSITIVITY_MIN = 0
     SENSITIVITY_MAX = 1_000
 
+    HISTORY_DEPTH_DEFAULT = 3
+    HISTORY_DEPTH_MIN = 2
+    HISTORY_DEPTH_MAX = 16
+
+    MODE_DEFAULT = DetectionMode.FRAME_DIFFERENCE
+
+    # Background learning rate in percent of the new frame blended into the running average per frame
+    LEARNING_RATE_DEFAULT = 5
+    LEARNING_RATE_MIN = 1
+    LEARNING_RATE_MAX = 100
+
+    # 0 derives the kernel from the region size, see `auto_blur_kernel_size`
+    BLUR_KERNEL_SIZE_DEFAULT = 0
+    BLUR_KERNEL_SIZE_MIN = 0
+    BLUR_KERNEL_SIZE_MAX = 63
+
+    PIPELINE_DEFAULT = PreprocessPipeline.FULL
+
+    BLUR_MODE_DEFAULT = BlurMode.GAUSSIAN
+
     def __init__(
             self,
             binary_threshold: int = BINARIZATION_THRESHOLD_DEFAULT,
             difference_threshold: int = DIFFERENCE_THRESHOLD_DEFAULT,
-            sensitivity: int = SENSITIVITY_DEFAULT
+            sensitivity: int = SENSITIVITY_DEFAULT,
+            history_depth: int = HISTORY_DEPTH_DEFAULT,
+            mode: DetectionMode = MODE_DEFAULT,
+            learning_rate: int = LEARNING_RATE_DEFAULT,
+            blur_kernel_size: int = BLUR_KERNEL_SIZE_DEFAULT,
+            pipeline: PreprocessPipeline = PIPELINE_DEFAULT,
+            blur_mode: BlurMode = BLUR_MODE_DEFAULT
     ) -> None:
         self._binary_threshold: int = binary_threshold
         self._difference_threshold: int = difference_threshold
         self._sensitivity: int = sensitivity
+        self._history_depth: int = history_depth
+        self._mode: DetectionMode = DetectionMode(mode)
+        self._learning_rate: int = learning_rate
+        self._blur_kernel_size: int = blur_kernel_size
+        self._pipeline: PreprocessPipeline = PreprocessPipeline(pipeline)
+        self._blur_mode: BlurMode = BlurMode(blur_mode)
+
+        self._model: _FrameDifferenceModel | _RunningAverageModel | None = None
 
-        self._frame_buffer: list[np.ndarray] = list()
+        # Scratch buffers reused by every call
+        self._gray: np.ndarray | None = None
+        self._preprocessed: np.ndarray | None = None
+        self._accumulated: np.ndarray | None = None
+        self._binary: np.ndarray | None = None
+
+    def reset(self) -> None:
+        """
+        Drops the frame history. The next frame is treated as the first one.
+        """
+        self._model = None
 
     @property
-    def difference_threshold(self) -> int:
+    def binary_threshold(self) -> int:
         return self._binary_threshold
 
+    @binary_threshold.setter
+    def binary_threshold(self, value: int) -> None:
+        self._binary_threshold = _clamp(
+            value, _MotionDetectorBase.BINARIZATION_THRESHOLD_MIN, _MotionDetectorBase.BINARIZATION_THRESHOLD_MAX
+        )
+
+    @property
+    def difference_threshold(self) -> int:
+        return self._difference_threshold
+
     @difference_threshold.setter
     def difference_threshold(self, value: int) -> None:
         self._difference_threshold = _clamp(
-            value, MotionDetector.DIFFERENCE_THRESHOLD_MIN, MotionDetector.DIFFERENCE_THRESHOLD_MAX
+            value, _MotionDetectorBase.DIFFERENCE_THRESHOLD_MIN, _MotionDetectorBase.DIFFERENCE_THRESHOLD_MAX
         )
 
     @property
@@ -64,20 +274,398 @@ class MotionDetector:
 
     @sensitivity.setter
     def sensitivity(self, value: int) -> None:
-        self._sensitivity = _clamp(value, MotionDetector.SENSITIVITY_MIN, MotionDetector.SENSITIVITY_MAX)
+        self._sensitivity = _clamp(value, _MotionDetectorBase.SENSITIVITY_MIN, _MotionDetectorBase.SENSITIVITY_MAX)
+
+    @property
+    def history_depth(self) -> int:
+        return self._history_depth
+
+    @history_depth.setter
+    def history_depth(self, value: int) -> None:
+        value = _clamp(value, _MotionDetectorBase.HISTORY_DEPTH_MIN, _MotionDetectorBase.HISTORY_DEPTH_MAX)
+        if value == self._history_depth:
+            return
+
+        self._history_depth = value
+        self.reset()
+
+    @property
+    def mode(self) -> DetectionMode:
+        return self._mode
+
+    @mode.setter
+    def mode(self, value: DetectionMode | str) -> None:
+        value = DetectionMode(value)
+        if value == self._mode:
+            return
+
+        self._mode = value
+        self.reset()
+
+    @property
+    def learning_rate(self) -> int:
+        return self._learning_rate
+
+    @learning_rate.setter
+    def learning_rate(self, value: int) -> None:
+        value = _clamp(value, _MotionDetectorBase.LEARNING_RATE_MIN, _MotionDetectorBase.LEARNING_RATE_MAX)
+        if value == self._learning_rate:
+            return
+
+        self._learning_rate = value
+        self.reset()
+
+    @property
+    def blur_kernel_size(self) -> int:
+        return self._blur_kernel_size
+
+    @blur_kernel_size.setter
+    def blur_kernel_size(self, value: int) -> None:
+        value = _clamp(value, _MotionDetectorBase.BLUR_KERNEL_SIZE_MIN, _MotionDetectorBase.BLUR_KERNEL_SIZE_MAX)
+        # Gaussian kernels must be odd
+        value = value | 1 if value else 0
+        if value == self._blur_kernel_size:
+            return
+
+        self._blur_kernel_size = value
+        self.reset()
+
+    @property
+    def pipeline(self) -> PreprocessPipeline:
+        return self._pipeline
+
+    @pipeline.setter
+    def pipeline(self, value: PreprocessPipeline | str) -> None:
+        value = PreprocessPipeline(value)
+        if value == self._pipeline:
+            return
+
+        self._pipeline = value
+        self.reset()
+
+    @property
+    def blur_mode(self) -> BlurMode:
+        return self._blur_mode
+
+    @blur_mode.setter
+    def blur_mode(self, value: BlurMode | str) -> None:
+        value = BlurMode(value)
+        if value == self._blur_mode:
+            return
+
+        self._blur_mode = value
+        self.reset()
+
+    @staticmethod
+    def auto_blur_kernel_size(width: int, height: int) -> int:
+        """
+        @return: the reference kernel scaled to a region of the given size, so blur cost follows the region area.
+        """
+        kernel_size = round(BLUR_KERNEL_SIZE[0] * min(width, height) / BLUR_REFERENCE_SIZE)
+
+        return _clamp(kernel_size | 1, 3, _MotionDetectorBase.BLUR_KERNEL_SIZE_MAX)
+
+    def _kernel_size(self, width: int, height: int) -> int:
+        return self._blur_kernel_size or _MotionDetectorBase.auto_blur_kernel_size(width, height)
+
+    def _create_model(self, frame: np.ndarray) -> _FrameDifferenceModel | _RunningAverageModel:
+        if self._mode == DetectionMode.RUNNING_AVERAGE:
+            return _RunningAverageModel(self._learning_rate / 100, frame)
+
+        return _FrameDifferenceModel(self._history_depth, frame)
+
+
+class MotionDetector(_MotionDetectorBase):
+    SKIP_STATIC_FRAMES_DEFAULT = True
+
+    # Largest change of any pixel channel for a frame to still count as static. Blurring only averages
+    # changes, so up to the binarization threshold a static frame could not have set off a difference.
+    # Tolerances above the binarization threshold are not applied, see `static_tolerance`
+    STATIC_TOLERANCE_DEFAULT = 2
+    STATIC_TOLERANCE_MIN = 0
+    STATIC_TOLERANCE_MAX = 32
+
+    def __init__(
+            self,
+            *args,
+            mask: np.ndarray | None = None,
+            skip_static_frames: bool = SKIP_STATIC_FRAMES_DEFAULT,
+            static_tolerance: int = STATIC_TOLERANCE_DEFAULT,
+            **kwargs
+    ) -> None:
+        """
+        @param mask: region of interest, see `mask`.
+        @param skip_static_frames: see `skip_static_frames`.
+        """
+        super().__init__(*args, **kwargs)
+
+        self._mask: np.ndarray | None = mask
+        # `mask` scaled to the preprocessed frames and the number of pixels it keeps
+        self._scaled_mask: np.ndarray | None = None
+        self._mask_area: int = 0
+
+        self._skip_static_frames: bool = skip_static_frames
+        self._static_tolerance: int = static_tolerance
+        # Copy of the last raw frame that went through the full pipeline
+        self._reference_frame: np.ndarray | None = None
+        # Consecutive static frames since the last full preprocessing, 0 for a frame that changed
+        self._static_run: int = 0
+        self._skipped: bool = False
+
+    def reset(self) -> None:
+        super().reset()
+        self._reference_frame = None
+        self._static_run = 0
+
+    @property
+    def skip_static_frames(self) -> bool:
+        """
+        Whether frames that barely differ from the last preprocessed one skip preprocessing.
+
+        A static frame reuses the previous preprocessed frame, so the history sees an exact repeat of it.
+        In `FRAME_DIFFERENCE` mode, once the whole history holds the repeated frame the difference is
+        known to be empty and detection is skipped as well.
+        """
+        return self._skip_static_frames
+
+    @skip_static_frames.setter
+    def skip_static_frames(self, value: bool) -> None:
+        value = bool(value)
+        if value == self._skip_static_frames:
+            return
+
+        self._skip_static_frames = value
+        self._reference_frame = None
+        self._static_run = 0
+
+    @property
+    def static_tolerance(self) -> int:
+        """
+        Largest per-pixel change of a static frame. Frames are compared with at most `binary_threshold`,
+        so a change that binarization would keep is never skipped.
+        """
+        return self._static_tolerance
+
+    @static_tolerance.setter
+    def static_tolerance(self, value: int) -> None:
+        self._static_tolerance = _clamp(
+            value, MotionDetector.STATIC_TOLERANCE_MIN, MotionDetector.STATIC_TOLERANCE_MAX
+        )
+
+    @property
+    def static(self) -> bool:
+        """
+        Whether the last preprocessed frame was static and reused the previous result.
+        """
+        return self._static_run > 0
+
+    @property
+    def skipped(self) -> bool:
+        """
+        Whether the last detection was skipped because the difference could only be empty.
+        """
+        return self._skipped
+
+    @property
+    def raw_difference(self) -> np.ndarray | None:
+        """
+        Difference image of the last detected frame before binarization.
+        """
+        return self._accumulated
+
+    @property
+    def masked_raw_difference(self) -> np.ndarray | None:
+        """
+        Pixels of `raw_difference` inside the region of interest, flattened. Allocates, unlike `raw_difference`.
+        """
+        if self._accumulated is None or self._mask is None or self._scaled_mask is None:
+            return self._accumulated
+
+        return self._accumulated[self._scaled_mask > 0]
+
+    @property
+    def mask(self) -> np.ndarray | None:
+        """
+        Region of interest: (height, width) uint8 array, nonzero inside, at any scale of the frames passed
+        to `detect`. Motion outside of it is ignored and the difference value is relative to its area.
+        None considers the whole frame.
+        """
+        return self._mask
+
+    @mask.setter
+    def mask(self, value: np.ndarray | None) -> None:
+        if value is self._mask:
+            return
+
+        self._mask = value
+        self._scaled_mask = None
+
+    def _allocate(self, shape: tuple[int, int]) -> None:
+        self._preprocessed = np.empty(shape, dtype=np.uint8)
+        self._accumulated = np.empty(shape, dtype=np.uint8)
+        self._binary = np.empty(shape, dtype=np.uint8)
+        self._model = None
+
+    def preprocess(self, frame: np.ndarray) -> np.ndarray:
+        """
+        @param frame: RGB frame, or an already grayscale one.
+        @return: grayscale, blurred frame, downscaled by the `DOWNSCALED` pipeline.
+        The buffer is reused by the next call, copy it to keep it.
+        """
+        height, width = frame.shape[:2]
+        shape = _preprocessed_shape(height, width, self._pipeline)
+
+        if self._binary is None or self._binary.shape != shape:
+            self._allocate(shape)
+        if frame.ndim == 3 and (self._gray is None or self._gray.shape != (height, width)):
+            self._gray = np.empty((height, width), dtype=np.uint8)
+
+        if self._skip_static_frames and self._is_static(frame):
+            self._static_run += 1
+            return self._preprocessed
+
+        self._static_run = 0
+
+        return _preprocess(
+            frame,
+            self._kernel_size(width, height),
+            self._pipeline,
+            gray=self._gray,
+            dst=self._preprocessed,
+            blur_mode=self._blur_mode
+        )
 
     def detect(self, frame: np.ndarray) -> tuple[np.ndarray, int, bool]:
-        frame = _preprocess(frame)
+        """
+        @return: (binarized difference, difference value, motion detected).
+        The difference image is a buffer reused by the next call, copy it to keep it.
+        """
+        return self.detect_preprocessed(self.preprocess(frame))
+
+    def detect_preprocessed(self, frame: np.ndarray) -> tuple[np.ndarray, int, bool]:
+        """
+        Same as `detect` for a frame that has already been through `preprocess`.
+        """
         height, width = frame.shape[:2]
 
-        self._frame_buffer = (self._frame_buffer[1:] + [frame]) if self._frame_buffer else [frame, frame, frame]
+        # The last `history_depth - 1` differences, all the model combines, are of identical frames
+        self._skipped = (
+                frame is self._preprocessed
+                and self._model is not None
+                and self._mode == DetectionMode.FRAME_DIFFERENCE
+                and self._static_run >= self._history_depth
+        )
+        if self._skipped:
+            return self._binary, 0, False
+
+        if self._binary is None or self._binary.shape != (height, width):
+            self._allocate((height, width))
+
+        if self._model is None:
+            self._model = self._create_model(frame)
+
+        self._model.update(frame, dst=self._accumulated)
+
+        cv2.threshold(self._accumulated, self._binary_threshold, 255, cv2.THRESH_BINARY, dst=self._binary)
+
+        area = height * width
+        if self._mask is not None:
+            mask = self._fitted_mask(height, width)
+            cv2.bitwise_and(self._binary, mask, dst=self._binary)
+            area = self._mask_area
+
+        diff = cv2.countNonZero(self._binary)
+        diff = diff * self._sensitivity // area if area else 0
+
+        return self._binary, diff, diff > self._difference_threshold
+
+    def _is_static(self, frame: np.ndarray) -> bool:
+        """
+        Compares the raw frame with the last one that was fully preprocessed, which is cheaper than a blur pass.
+        Comparing with that frame rather than the previous one keeps slow drift from going unseen.
+        """
+        tolerance = min(self._static_tolerance, self._binary_threshold)
+        static = (
+                self._model is not None
+                and self._reference_frame is not None
+                and self._reference_frame.shape == frame.shape
+                and cv2.norm(frame, self._reference_frame, cv2.NORM_INF) <= tolerance
+        )
+
+        if not static:
+            if self._reference_frame is None or self._reference_frame.shape != frame.shape:
+                self._reference_frame = np.empty_like(frame)
+            np.copyto(self._reference_frame, frame)
+
+        return static
+
+    def _fitted_mask(self, height: int, width: int) -> np.ndarray:
+        if self._scaled_mask is None or self._scaled_mask.shape != (height, width):
+            scaled_mask = cv2.resize(self._mask, (width, height), interpolation=cv2.INTER_NEAREST)
+            self._scaled_mask = np.where(scaled_mask > 0, 255, 0).astype(np.uint8)
+            self._mask_area = cv2.countNonZero(self._scaled_mask)
+
+        return self._scaled_mask
+
+
+class BatchMotionDetector(_MotionDetectorBase):
+    """
+    Detects motion in several equally sized regions of one capture in a single pass.
+
+    The capture is converted to grayscale once and the regions are blurred into one
+    (regions, height, width) stack. Differencing, binarization and counting then run once over the
+    whole stack, so the per-region cost shrinks as regions are added.
+    """
+
+    def _allocate(self, shape: tuple[int, int, int]) -> None:
+        self._preprocessed = np.empty(shape, dtype=np.uint8)
+        self._accumulated = np.empty(shape, dtype=np.uint8)
+        self._binary = np.empty(shape, dtype=np.uint8)
+        self._model = None
+
+    def detect(
+            self,
+            capture: np.ndarray,
+            offsets: list[tuple[int, int]],
+            size: tuple[int, int]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        @param capture: RGB or grayscale capture containing all regions.
+        @param offsets: (x, y) of the top left corner of every region within the capture.
+        @param size: (width, height) of every region.
+        @return: (binarized differences, difference values, motion detected), one entry per region.
+        The difference stack is a buffer reused by the next call, copy it to keep it.
+        """
+        width, height = size
+        shape = (len(offsets), *_preprocessed_shape(height, width, self._pipeline))
+
+        if self._binary is None or self._binary.shape != shape:
+            self._allocate(shape)
+
+        if capture.ndim == 3:
+            if self._gray is None or self._gray.shape != capture.shape[:2]:
+                self._gray = np.empty(capture.shape[:2], dtype=np.uint8)
+            gray = cv2.cvtColor(capture, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            gray = capture
+
+        kernel_size = self._kernel_size(width, height)
+        for region, (x, y) in zip(self._preprocessed, offsets):
+            _blur(gray[y:y + height, x:x + width], kernel_size, self._pipeline, dst=region, blur_mode=self._blur_mode)
+
+        # Elementwise stages see the stack as one tall image
+        _, stack_height, stack_width = shape
+        stack = self._preprocessed.reshape(-1, stack_width)
+        accumulated = self._accumulated.reshape(-1, stack_width)
+        binary = self._binary.reshape(-1, stack_width)
+
+        if self._model is None:
+            self._model = self._create_model(stack)
 
-        frame_0, frame_1, frame_2 = self._frame_buffer
-        diff_1, diff_2 = cv2.absdiff(frame_0, frame_1), cv2.absdiff(frame_1, frame_2)
-        frame_diff = cv2.bitwise_or(diff_1, diff_2)
-        _, frame_diff = cv2.threshold(frame_diff, self._binary_threshold, 255, cv2.THRESH_BINARY)
+        self._model.update(stack, dst=accumulated)
+        cv2.threshold(accumulated, self._binary_threshold, 255, cv2.THRESH_BINARY, dst=binary)
 
-        diff = cv2.countNonZero(frame_diff)
-        diff = diff * self._sensitivity // (height * width)
+        counts = np.count_nonzero(self._binary.reshape(len(offsets), -1), axis=1)
+        values = counts * self._sensitivity // (stack_height * stack_width)
 
-        return frame_diff, diff, diff > self._difference_threshold
+        return self._binary, values, values > self._difference_threshold
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+
+from lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+__all__ = [
+    'PixelStatistics'
+]
+
+
+class PixelStatistics:
+    """
+    Streaming per-pixel mean and variance of a sequence of equally sized grayscale frames.
+
+    Uses Welford's algorithm on float32 arrays: memory does not grow with the number of frames
+    and every update runs in preallocated buffers.
+    """
+
+    # Standard deviation, in grey levels, shown at full intensity by `heatmap`
+    HEATMAP_MAX_DEVIATION = 16
+
+    def __init__(self, shape: tuple[int, int]) -> None:
+        self._count = 0
+        self._mean = np.zeros(shape, dtype=np.float32)
+        self._m2 = np.zeros(shape, dtype=np.float32)
+
+        self._delta = np.empty(shape, dtype=np.float32)
+        self._delta_after = np.empty(shape, dtype=np.float32)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self._mean.shape
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._mean
+
+    def reset(self) -> None:
+        self._count = 0
+        self._mean.fill(0)
+        self._m2.fill(0)
+
+    def copy(self) -> 'PixelStatistics':
+        statistics = PixelStatistics(self.shape)
+        statistics._count = self._count
+        np.copyto(statistics._mean, self._mean)
+        np.copyto(statistics._m2, self._m2)
+
+        return statistics
+
+    def update(self, frame: np.ndarray) -> None:
+        self._count += 1
+
+        np.subtract(frame, self._mean, out=self._delta)
+        np.divide(self._delta, np.float32(self._count), out=self._delta_after)
+        self._mean += self._delta_after
+        np.subtract(frame, self._mean, out=self._delta_after)
+
+        self._delta *= self._delta_after
+        self._m2 += self._delta
+
+    def variance(self) -> np.ndarray:
+        """
+        @return: sample variance of every pixel, zeros before two frames have been seen.
+        """
+        if self._count < 2:
+            return np.zeros(self.shape, dtype=np.float32)
+
+        return self._m2 / np.float32(self._count - 1)
+
+    def standard_deviation(self) -> np.ndarray:
+        return np.sqrt(self.variance())
+
+    def heatmap(self) -> np.ndarray:
+        """
+        @return: RGB image of the per-pixel standard deviation, dark for still pixels and bright for noisy ones.
+        """
+        scale = 255 / PixelStatistics.HEATMAP_MAX_DEVIATION
+        intensity = cv2.convertScaleAbs(self.standard_deviation(), alpha=scale)
+
+        return cv2.cvtColor(cv2.applyColorMap(intensity, cv2.COLORMAP_INFERNO), cv2.COLOR_BGR2RGB)
+
+    def save(self, path: str | Path) -> None:
+        """
+        Writes the heatmap for a `.png` path, otherwise an `.npz` archive with the frame count,
+        mean and variance arrays.
+        """
+        path = Path(path)
+
+        if path.suffix.lower() == '.png':
+            cv2.imwrite(str(path), cv2.cvtColor(self.heatmap(), cv2.COLOR_RGB2BGR))
+            return
+
+        np.savez(path, count=self._count, mean=self._mean, variance=self.variance())
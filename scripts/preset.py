@@ -1,8 +1,11 @@
-import json
-from dataclasses import dataclass
-from pathlib import Path
+import dataclasses
+import typing
+from dataclasses import dataclass, field
+from typing import Any
 
+from frame_pacer import FramePacer
 from motion_detector import MotionDetector
+from region_tracker import RegionTracker
 
 
 __all__ = [
@@ -14,63 +17,72 @@ __all__ = [
 class Preset:
     DEFAULT_NAME = 'Default'
     DEFAULT_BUFF_COOLDOWN = 60 * 3
+    DEFAULT_REGION_SIZE = 92
+    MIN_REGION_SIZE = 16
+    MAX_REGION_SIZE = 400
 
     name: str = DEFAULT_NAME
     binarization_threshold: int = MotionDetector.BINARIZATION_THRESHOLD_DEFAULT
     sensitivity: int = MotionDetector.SENSITIVITY_DEFAULT
     difference_threshold: int = MotionDetector.DIFFERENCE_THRESHOLD_DEFAULT
+    history_depth: int = MotionDetector.HISTORY_DEPTH_DEFAULT
+    detection_mode: str = MotionDetector.MODE_DEFAULT.value
+    learning_rate: int = MotionDetector.LEARNING_RATE_DEFAULT
     use_buffs: bool = False
     buff_period: int = DEFAULT_BUFF_COOLDOWN
     screen_x: int = 0
     screen_y: int = 0
+    region_width: int = DEFAULT_REGION_SIZE
+    region_height: int = DEFAULT_REGION_SIZE
+    blur_kernel_size: int = MotionDetector.BLUR_KERNEL_SIZE_DEFAULT
+    preprocess_pipeline: str = MotionDetector.PIPELINE_DEFAULT.value
+    blur_mode: str = MotionDetector.BLUR_MODE_DEFAULT.value
+    skip_static_frames: bool = MotionDetector.SKIP_STATIC_FRAMES_DEFAULT
+    static_tolerance: int = MotionDetector.STATIC_TOLERANCE_DEFAULT
+    # Shrink the region to `tracking_size` around the bobber once a cast has settled
+    adaptive_region: bool = False
+    tracking_size: int = RegionTracker.TRACKING_SIZE_DEFAULT
+    # Region of interest, see `roi_mask.encode_mask`. Empty watches the whole region
+    roi_mask: str = ''
+    # Bobber image, see `bobber_locator.encode_template`. Locates the bobber for `adaptive_region` when set
+    bobber_template: str = ''
+    # Centers of additional detection regions, each fished with its own state machine
+    extra_regions: list[list[int]] = field(default_factory=list)
+    target_fps: int = FramePacer.TARGET_FPS_DEFAULT
 
     @staticmethod
-    def load_all():
-        return _load_presets()
+    def from_dict(values: dict[str, Any]) -> 'Preset':
+        """
+        Builds a preset from stored values converted to the field types.
+        Unknown keys are ignored, missing or unconvertible values keep their defaults.
+        """
+        preset = Preset()
 
-    def delete(self):
-        return _delete_preset(self)
+        for preset_field in dataclasses.fields(Preset):
+            if preset_field.name not in values:
+                continue
 
-    def save(self):
-        return _save_preset(self)
+            try:
+                setattr(preset, preset_field.name, _coerce(values[preset_field.name], preset_field.type))
+            except (TypeError, ValueError):
+                pass
 
+        return preset
 
-_PRESETS_DIR = Path('presets')
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
 
 
-def _preset_path(preset: Preset) -> Path:
-    _PRESETS_DIR.mkdir(parents=True, exist_ok=True)
-    return _PRESETS_DIR / f'{preset.name}.json'
+def _coerce(value: Any, value_type: Any) -> Any:
+    if typing.get_origin(value_type) is list:
+        if not isinstance(value, list):
+            raise TypeError(f'Expected a list, got {value!r}')
 
+        item_type, = typing.get_args(value_type)
 
-def _save_preset(preset: Preset) -> None:
-    with open(_preset_path(preset), mode='w', encoding='utf-8') as preset_file:
-        json.dump(preset.__dict__, preset_file, indent=4)
+        return [_coerce(item, item_type) for item in value]
 
+    if value_type is bool and isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
 
-def _delete_preset(preset: Preset) -> None:
-    _preset_path(preset).unlink(missing_ok=True)
-
-
-def _load_preset(path: Path) -> Preset:
-    preset = Preset()
-
-    with open(path, mode='r', encoding='utf-8') as preset_file:
-        for attr_name, attr_value in dict(json.load(preset_file)).items():
-            setattr(preset, attr_name, attr_value)
-
-    return preset
-
-
-def _load_presets() -> list[Preset]:
-    _PRESETS_DIR.mkdir(parents=True, exist_ok=True)
-    presets = list(map(_load_preset, _PRESETS_DIR.iterdir()))
-
-    if any(preset.name == Preset.DEFAULT_NAME for preset in presets):
-        return presets
-
-    default = Preset()
-    _save_preset(default)
-    presets.append(default)
-
-    return presets
+    return value_type(value)
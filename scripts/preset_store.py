@@ -0,0 +1,478 @@
+"""
+Preset persistence.
+
+`PresetStore` keeps presets indexed in memory and persists them through a backend: a directory with
+one JSON file per preset, or a single JSON-lines file that loads in one read. Copy presets between the two:
+
+    $> python scripts/preset_store.py presets presets.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from atomic_write import write_atomically, write_json
+from motion_detector import MotionDetector
+from preset import Preset
+
+__all__ = [
+    'PresetBackend',
+    'DirectoryBackend',
+    'JsonLinesBackend',
+    'open_backend',
+    'PresetStore',
+    'Preferences'
+]
+
+PRESETS_DIR = Path('presets')
+PREFERENCES_FILE = Path('preferences.json')
+
+# Version of the stored preset records. Records of older versions are upgraded by `_MIGRATIONS` on load
+SCHEMA_VERSION = 2
+
+# Characters that cannot appear in file names on some systems, replaced in the names of preset files
+_UNSAFE_FILE_NAME_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def _migrate_1_to_2(record: dict[str, Any]) -> dict[str, Any]:
+    """
+    Version 1 records only hold the thresholds, buffs and region position. Fields added since take their defaults,
+    which keep the behavior of version 1 presets, except for static frame skipping: a static tolerance above the
+    binarization threshold of a sensitive preset could skip frames that show motion, so it is capped at it.
+    Missing fields only, directory files carry no version and go through this on every load.
+    """
+    if 'static_tolerance' not in record and 'binarization_threshold' in record:
+        try:
+            binarization_threshold = max(int(record['binarization_threshold']), 0)
+        except (TypeError, ValueError):
+            return record
+
+        record = record | {'static_tolerance': min(MotionDetector.STATIC_TOLERANCE_DEFAULT, binarization_threshold)}
+
+    return record
+
+
+# Upgrades of stored records, keyed by the version they upgrade from. Fields added to `Preset` need none
+# as long as their defaults keep the old behavior, missing fields take their defaults;
+# renamed fields and changed meanings do
+_MIGRATIONS: dict[int, Callable[[dict[str, Any]], dict[str, Any]]] = {
+    1: _migrate_1_to_2
+}
+
+_JSON_LINES_FORMAT = 'auto-fisher-presets'
+
+_logger = logging.getLogger('auto_fisher.presets')
+
+
+def _check_version(version: int) -> None:
+    if version > SCHEMA_VERSION:
+        raise ValueError(f'Preset schema version {version} is newer than the supported {SCHEMA_VERSION}')
+
+
+def _migrate(record: dict[str, Any], version: int) -> dict[str, Any]:
+    """
+    @return: the record of schema `version` upgraded to `SCHEMA_VERSION`.
+    """
+    for from_version in range(version, SCHEMA_VERSION):
+        if from_version in _MIGRATIONS:
+            record = _MIGRATIONS[from_version](record)
+
+    return record
+
+
+class PresetBackend:
+    """
+    Persistent storage of presets by name.
+    """
+
+    def load(self) -> dict[str, Preset]:
+        raise NotImplementedError()
+
+    def write(self, presets: dict[str, Preset], changes: dict[str, Preset | None]) -> None:
+        """
+        @param presets: all presets after the changes.
+        @param changes: presets saved, None for the ones deleted.
+        """
+        raise NotImplementedError()
+
+    def changed(self) -> dict[str, Preset | None]:
+        """
+        @return: presets changed by other programs since the last call, `load` or `write`, None for the ones removed.
+        """
+        raise NotImplementedError()
+
+
+class DirectoryBackend(PresetBackend):
+    """
+    One `<name>.json` per preset, the format presets have always been saved in.
+    Presets are keyed by the name stored in the file, so renamed files and names that are not valid
+    file names keep their names. Files carry no schema version, they are read as version 1.
+    """
+
+    _VERSION = 1
+
+    def __init__(self, directory: str | Path = PRESETS_DIR) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Modification time and stored preset name of every preset file as last read or written, by file stem
+        self._mtimes: dict[str, int] = {}
+        self._names: dict[str, str] = {}
+
+    def load(self) -> dict[str, Preset]:
+        self._mtimes.clear()
+        self._names.clear()
+
+        return {name: preset for name, preset in self.changed().items() if preset is not None}
+
+    def write(self, presets: dict[str, Preset], changes: dict[str, Preset | None]) -> None:
+        for name, preset in changes.items():
+            stem = self._stem(name)
+            path = self._path(stem)
+
+            if preset is None:
+                path.unlink(missing_ok=True)
+                self._mtimes.pop(stem, None)
+                self._names.pop(stem, None)
+                continue
+
+            write_json(path, preset.to_dict())
+            self._mtimes[stem] = path.stat().st_mtime_ns
+            self._names[stem] = name
+
+    def changed(self) -> dict[str, Preset | None]:
+        mtimes = {}
+        with os.scandir(self._directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith('.json') and not entry.name.startswith('.'):
+                    mtimes[entry.name[:-len('.json')]] = entry.stat().st_mtime_ns
+
+        changed: dict[str, Preset | None] = {}
+
+        # Removals first, so a preset whose file was renamed is reported by its new file
+        for stem in list(self._mtimes.keys()):
+            if stem not in mtimes:
+                del self._mtimes[stem]
+                self._forget(stem, changed)
+
+        for stem, mtime in mtimes.items():
+            if self._mtimes.get(stem) == mtime:
+                continue
+
+            path = self._path(stem)
+            try:
+                with open(path, mode='r', encoding='utf-8') as preset_file:
+                    record = json.load(preset_file)
+            except (OSError, ValueError):
+                # Possibly caught mid-write by another program, retried on the next call
+                continue
+
+            # Not retried until the file changes again
+            self._mtimes[stem] = mtime
+
+            if not isinstance(record, dict):
+                _logger.warning('Skipped %s: not a preset', path)
+                self._forget(stem, changed)
+                continue
+
+            preset = Preset.from_dict(_migrate({'name': stem} | record, DirectoryBackend._VERSION))
+            previous_name = self._names.get(stem)
+            if previous_name is not None and previous_name != preset.name:
+                changed[previous_name] = None
+
+            changed[preset.name] = preset
+            self._names[stem] = preset.name
+
+        return changed
+
+    def _forget(self, stem: str, changed: dict[str, Preset | None]) -> None:
+        """
+        Reports the preset last read from file `stem`, if any, as removed.
+        """
+        name = self._names.pop(stem, None)
+        if name is not None:
+            changed[name] = None
+
+    def _stem(self, name: str) -> str:
+        """
+        @return: stem of the file holding preset `name`, or of a new file for it.
+        """
+        for stem, stored_name in self._names.items():
+            if stored_name == name:
+                return stem
+
+        base = _UNSAFE_FILE_NAME_CHARACTERS.sub('_', name).strip(' .') or '_'
+        stem, suffix = base, 1
+        # Differently named presets may sanitize to the same stem
+        while stem in self._names:
+            suffix += 1
+            stem = f'{base} ({suffix})'
+
+        return stem
+
+    def _path(self, stem: str) -> Path:
+        return self._directory / f'{stem}.json'
+
+
+class JsonLinesBackend(PresetBackend):
+    """
+    All presets in one file: a header line with the schema version, then one compact JSON object per preset.
+    Loads in a single read and rewrites the whole file, atomically, on every write.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        self._mtime: int | None = None
+        # Records as last read or written, to tell which presets another program changed
+        self._records: dict[str, dict[str, Any]] = {}
+
+    def load(self) -> dict[str, Preset]:
+        """
+        @raise ValueError: if the file is not a preset file or of a newer schema version.
+        """
+        self._mtime = self._stat()
+        self._records = self._read() if self._mtime is not None else {}
+
+        return {name: Preset.from_dict(record) for name, record in self._records.items()}
+
+    def write(self, presets: dict[str, Preset], changes: dict[str, Preset | None]) -> None:
+        self._records = {name: preset.to_dict() for name, preset in presets.items()}
+
+        def write_lines(file: Any) -> None:
+            file.write(json.dumps({'format': _JSON_LINES_FORMAT, 'version': SCHEMA_VERSION}) + '\n')
+            for record in self._records.values():
+                file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomically(self._path, write_lines)
+        self._mtime = self._stat()
+
+    def changed(self) -> dict[str, Preset | None]:
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return {}
+
+        try:
+            records = self._read() if mtime is not None else {}
+        except (OSError, ValueError):
+            # Possibly caught mid-write by another program, retried on the next call
+            return {}
+        self._mtime = mtime
+
+        changed: dict[str, Preset | None] = {
+            name: Preset.from_dict(record)
+            for name, record in records.items()
+            if self._records.get(name) != record
+        }
+        changed |= {name: None for name in self._records.keys() - records.keys()}
+
+        self._records = records
+
+        return changed
+
+    def _stat(self) -> int | None:
+        try:
+            return self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        with open(self._path, mode='r', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+
+        header = json.loads(lines[0]) if lines else {}
+        if not isinstance(header, dict) or header.get('format') != _JSON_LINES_FORMAT:
+            raise ValueError(f'{self._path} is not a preset file')
+
+        version = header.get('version', SCHEMA_VERSION)
+        if not isinstance(version, int):
+            raise ValueError(f'{self._path}: invalid schema version {version!r}')
+        _check_version(version)
+
+        records = {}
+        for number, line in enumerate(lines[1:], start=2):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+
+            if not isinstance(record, dict) or not isinstance(record.get('name'), str):
+                _logger.warning('Skipped line %d of %s: not a preset', number, self._path)
+                continue
+
+            record = _migrate(record, version)
+            records[record['name']] = record
+
+        return records
+
+
+def open_backend(path: str | Path) -> PresetBackend:
+    """
+    @return: a `JsonLinesBackend` for a `.jsonl` path, a `DirectoryBackend` otherwise.
+    """
+    path = Path(path)
+
+    return JsonLinesBackend(path) if path.suffix == '.jsonl' else DirectoryBackend(path)
+
+
+class PresetStore:
+    """
+    Presets indexed by name in memory, persisted by a `PresetBackend`.
+
+    Reads are served from the index. Saves and deletions update the index at once and reach the backend
+    on a later `update`, coalescing repeated saves of a preset. `update` also polls the backend and
+    reloads presets changed by anything else.
+    """
+
+    # Seconds a save is held back, further saves within it are written together
+    WRITE_DELAY = 0.5
+    # Seconds between checks for presets changed by other programs
+    POLL_PERIOD = 1.0
+
+    def __init__(
+            self,
+            backend: PresetBackend | None = None,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        @param backend: defaults to the `presets` directory.
+        """
+        self._backend = backend if backend is not None else DirectoryBackend()
+        self._clock = clock
+
+        self._presets: dict[str, Preset] = self._backend.load()
+        # Presets to write, None to delete, with the time they were first changed
+        self._pending: dict[str, tuple[Preset | None, float]] = {}
+        self._last_poll = self._clock()
+
+        if Preset.DEFAULT_NAME not in self._presets:
+            self.save(Preset())
+            self.flush()
+
+    def names(self) -> list[str]:
+        return list(self._presets.keys())
+
+    def presets(self) -> list[Preset]:
+        return list(self._presets.values())
+
+    def get(self, name: str) -> Preset | None:
+        return self._presets.get(name)
+
+    def save(self, preset: Preset) -> None:
+        self._presets[preset.name] = preset
+        self._schedule(preset.name, preset)
+
+    def delete(self, name: str) -> None:
+        self._presets.pop(name, None)
+        self._schedule(name, None)
+
+    def update(self) -> set[str]:
+        """
+        Writes the saves and deletions that are due and reloads presets changed elsewhere. Call it periodically.
+
+        @return: names of presets added, changed or removed elsewhere since the last poll.
+        """
+        now = self._clock()
+
+        if any(now - changed_time >= PresetStore.WRITE_DELAY for _, changed_time in self._pending.values()):
+            self.flush()
+
+        if now - self._last_poll < PresetStore.POLL_PERIOD:
+            return set()
+        self._last_poll = now
+
+        changed = set()
+        for name, preset in self._backend.changed().items():
+            # Presets about to be written are newer than the stored ones
+            if name in self._pending:
+                continue
+
+            if preset is None:
+                self._presets.pop(name, None)
+            else:
+                self._presets[name] = preset
+            changed.add(name)
+
+        return changed
+
+    def flush(self) -> None:
+        """
+        Writes all pending saves and deletions now.
+        """
+        if not self._pending:
+            return
+
+        changes = {name: preset for name, (preset, _) in self._pending.items()}
+        self._pending.clear()
+        self._backend.write(self._presets, changes)
+
+    def _schedule(self, name: str, preset: Preset | None) -> None:
+        _, changed_time = self._pending.get(name, (None, self._clock()))
+        self._pending[name] = (preset, changed_time)
+
+
+class Preferences:
+    """
+    Small JSON settings file kept in memory. Changes are written once they stop coming for `WRITE_DELAY`.
+    """
+
+    WRITE_DELAY = 1.0
+
+    def __init__(self, path: str | Path = PREFERENCES_FILE, clock: Callable[[], float] = time.monotonic) -> None:
+        self._path = Path(path)
+        self._clock = clock
+        self._last_change: float | None = None
+
+        try:
+            with open(self._path, mode='r', encoding='utf-8') as preferences_file:
+                self._values: dict[str, Any] = json.load(preferences_file)
+        except (FileNotFoundError, ValueError):
+            self._values = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def set(self, **kwargs) -> None:
+        if all(self._values.get(key) == value for key, value in kwargs.items()):
+            return
+
+        self._values |= kwargs
+        self._last_change = self._clock()
+
+    def update(self) -> None:
+        """
+        Writes the preferences if they have changed and then stayed unchanged for `WRITE_DELAY`. Call it periodically.
+        """
+        if self._last_change is not None and self._clock() - self._last_change >= Preferences.WRITE_DELAY:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._last_change is None:
+            return
+
+        write_json(self._path, self._values)
+        self._last_change = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='preset directory or .jsonl file to copy from')
+    parser.add_argument('target', help='preset directory or .jsonl file to copy to, existing presets are kept')
+    args = parser.parse_args()
+
+    presets = open_backend(args.source).load()
+
+    target = open_backend(args.target)
+    target.write(target.load() | presets, dict(presets))
+
+    print(f'Copied {len(presets)} presets from {args.source} to {args.target}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from frame_store import FrameStore, FrameStoreWriter
+
+__all__ = [
+    'Recording',
+    'FrameRecorder',
+    'load_recording'
+]
+
+
+@dataclass(frozen=True)
+class Recording:
+    """
+    @param frames: (frames, height, width, 3) captured regions,
+    or (frames, height, width) if `preprocessed`.
+    @param timestamps: capture time of every frame, seconds.
+    @param bites: ground-truth bite times, seconds.
+    @param preprocessed: frames are the output of the detector preprocessing rather than raw captures.
+    """
+    frames: np.ndarray
+    timestamps: np.ndarray
+    bites: np.ndarray
+    preprocessed: bool = False
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+
+class FrameRecorder:
+    """
+    Appends captured regions with their timestamps and bite markers to a frame store (see `frame_store`).
+
+    A store only holds frames of one size. When the frame size changes, because the region was resized or the
+    preprocessing pipeline switched, recording continues in a new store next to the first one:
+    `session.frames`, `session-1.frames`, `session-2.frames` and so on.
+
+    @param preprocessed: whether the recorded frames are preprocessed grayscale frames, a third of the size.
+    """
+
+    def __init__(self, path: str | Path, preprocessed: bool = False) -> None:
+        self._path = Path(path)
+        self._preprocessed = preprocessed
+
+        self._writer: FrameStoreWriter | None = None
+        self._shape: tuple[int, ...] | None = None
+        self._segment = 0
+        self._pending_bite = False
+
+    @property
+    def path(self) -> Path:
+        """
+        Store the frames are currently recorded to.
+        """
+        return self._segment_path(self._segment)
+
+    @property
+    def preprocessed(self) -> bool:
+        return self._preprocessed
+
+    def record(self, frame: np.ndarray, timestamp: float) -> None:
+        if self._writer is not None and frame.shape != self._shape:
+            self._writer.close()
+            self._writer = None
+            self._segment += 1
+
+        if self._writer is None:
+            self._writer = self._open(frame.shape)
+            self._shape = frame.shape
+
+        if self._pending_bite:
+            self._writer.mark_bite()
+            self._pending_bite = False
+
+        self._writer.append(frame, timestamp)
+
+    def mark_bite(self) -> None:
+        """
+        Marks the next recorded frame as the one a bite was observed at.
+        """
+        self._pending_bite = True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def _open(self, shape: tuple[int, ...]) -> FrameStoreWriter:
+        while True:
+            try:
+                return FrameStoreWriter(self.path, shape, preprocessed=self._preprocessed)
+            except ValueError:
+                # Left by an earlier recording with frames of another size, appended to only if they match
+                self._segment += 1
+
+    def _segment_path(self, segment: int) -> Path:
+        if segment == 0:
+            return self._path
+
+        return self._path.with_name(f'{self._path.stem}-{segment}{self._path.suffix}')
+
+    def __enter__(self) -> 'FrameRecorder':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _load_archive(path: Path) -> Recording:
+    with np.load(path) as archive:
+        return Recording(
+            frames=archive['frames'],
+            timestamps=archive['timestamps'],
+            bites=archive['bites']
+        )
+
+
+def load_recording(path: str | Path) -> Recording:
+    """
+    Loads a frame store without reading the frames into memory.
+    Compressed `.npz` archives written by earlier versions are loaded whole.
+    """
+    path = Path(path)
+
+    if path.suffix == '.npz':
+        return _load_archive(path)
+
+    store = FrameStore(path)
+    return Recording(
+        frames=store.frames,
+        timestamps=store.timestamps,
+        bites=store.bites,
+        preprocessed=store.preprocessed
+    )
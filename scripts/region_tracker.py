@@ -0,0 +1,119 @@
+import numpy as np
+
+from lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+__all__ = [
+    'RegionTracker'
+]
+
+Region = tuple[int, int, int, int]
+
+
+class RegionTracker:
+    """
+    Shrinks the detection region around the bobber once a cast has settled.
+
+    While the line is being cast, the binarized differences of the full region are blended into an
+    exponential moving average, so the motion of the bobber landing and bobbing outweighs the earlier
+    flight. When the cast settles, the centroid of that average is taken as the bobber position and
+    `region` returns a `tracking_size` square around it until the next cast.
+    """
+
+    TRACKING_SIZE_DEFAULT = 40
+    TRACKING_SIZE_MIN = 16
+    TRACKING_SIZE_MAX = 256
+
+    # Weight of the newest difference in the motion average
+    _DECAY = 0.3
+
+    def __init__(self) -> None:
+        self._activity: np.ndarray | None = None
+        self._observing = False
+        # Bobber position as a fraction of the full region size, differences may be observed downscaled
+        self._center: tuple[float, float] | None = None
+
+    @property
+    def observing(self) -> bool:
+        return self._observing
+
+    @property
+    def center(self) -> tuple[float, float] | None:
+        """
+        Located bobber position, (x, y) as fractions of the full region width and height.
+        """
+        return self._center
+
+    def reset(self) -> None:
+        """
+        Returns to the full region until the next cast.
+        """
+        self._observing = False
+        self._center = None
+
+    def begin(self) -> None:
+        """
+        Call when a cast is issued: the following frames are captured from the full region and observed.
+        """
+        self._observing = True
+        self._center = None
+        self._activity = None
+
+    def observe(self, difference: np.ndarray) -> None:
+        """
+        @param difference: binarized difference image of the full region, at any scale.
+        """
+        if not self._observing:
+            return
+
+        if self._activity is None or self._activity.shape != difference.shape:
+            self._activity = np.zeros(difference.shape, dtype=np.float32)
+
+        cv2.accumulateWeighted(difference, self._activity, RegionTracker._DECAY)
+
+    def locate(self) -> None:
+        """
+        Call when the cast has settled. Keeps the full region if no motion was observed.
+        """
+        self._observing = False
+
+        if self._activity is None:
+            return
+
+        moments = cv2.moments(self._activity)
+        if moments['m00'] <= 0:
+            return
+
+        height, width = self._activity.shape
+        self._center = (
+            (moments['m10'] / moments['m00'] + 0.5) / width,
+            (moments['m01'] / moments['m00'] + 0.5) / height
+        )
+
+    def place(self, x: float, y: float) -> None:
+        """
+        Centers the tracking window on a bobber located by other means.
+
+        @param x: horizontal position as a fraction of the full region width.
+        @param y: vertical position as a fraction of the full region height.
+        """
+        self._observing = False
+        self._center = (x, y)
+
+    def region(self, full_region: Region, tracking_size: int) -> Region:
+        """
+        @return: the tracking window inside `full_region` if the bobber has been located, `full_region` otherwise.
+        """
+        if self._center is None:
+            return full_region
+
+        left, top, width, height = full_region
+        x, y = round(self._center[0] * width), round(self._center[1] * height)
+        tracking_width = min(tracking_size, width)
+        tracking_height = min(tracking_size, height)
+
+        offset_x = min(max(x - tracking_width // 2, 0), width - tracking_width)
+        offset_y = min(max(y - tracking_height // 2, 0), height - tracking_height)
+
+        return left + offset_x, top + offset_y, tracking_width, tracking_height
@@ -0,0 +1,240 @@
+"""
+Headless replay of a recorded session through the detection pipeline.
+
+Frames are fed through `MotionDetector.detect` and `FishingStateMachine` with the state machine clock
+driven by the recorded timestamps. Prints processing throughput, per-stage latency percentiles and
+precision/recall of reel-ins against the recorded bite markers.
+
+    $> python scripts/replay.py session.frames --mode running_average --tolerance 1.0
+
+Frames that barely differ from the previous one skip preprocessing, as they do live, unless
+`--no-skip-static-frames` is given. The share of frames that skipped detection altogether is reported.
+
+`--compare-pipelines` replays a raw recording through both preprocessing pipelines with the same settings
+and also reports on how many frames their motion decisions agree.
+
+    $> python scripts/replay.py session.frames --compare-pipelines
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+
+from motion_detector import MotionDetector, DetectionMode, PreprocessPipeline, BlurMode
+from recording import Recording, load_recording
+from statemachine import FishingStateMachine
+
+__all__ = [
+    'ReplayResult',
+    'replay',
+    'compare_pipelines'
+]
+
+_PERCENTILES = (50, 95, 99)
+
+BITE_TOLERANCE_DEFAULT = 1.0
+
+
+@dataclass
+class ReplayResult:
+    frames: int = 0
+    processing_time: float = 0.0
+    stage_latencies: dict[str, np.ndarray] = field(default_factory=dict)
+    casts: list[float] = field(default_factory=list)
+    reel_ins: list[float] = field(default_factory=list)
+    bites: list[float] = field(default_factory=list)
+    # Motion decision of the detector for every frame
+    motion: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    # Frames on which the detector skipped detection as the frame had not changed
+    skipped_frames: int = 0
+    tolerance: float = BITE_TOLERANCE_DEFAULT
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.processing_time if self.processing_time > 0 else 0.0
+
+    def percentiles(self, stage: str) -> dict[int, float]:
+        """
+        @return: latency percentiles of the stage, microseconds.
+        """
+        latencies = self.stage_latencies[stage]
+        return {p: float(np.percentile(latencies, p)) / 1_000 for p in _PERCENTILES}
+
+    def _matched(self) -> int:
+        """
+        Greedily pairs every bite with the first unused reel-in within `tolerance` seconds after it.
+
+        @return: number of pairs.
+        """
+        reel_ins = sorted(self.reel_ins)
+        used = [False] * len(reel_ins)
+        matched = 0
+
+        for bite in sorted(self.bites):
+            for i, reel_in in enumerate(reel_ins):
+                if used[i] or reel_in < bite:
+                    continue
+                if reel_in - bite > self.tolerance:
+                    break
+
+                used[i] = True
+                matched += 1
+                break
+
+        return matched
+
+    @property
+    def precision(self) -> float:
+        if not self.reel_ins:
+            return 0.0
+
+        return self._matched() / len(self.reel_ins)
+
+    @property
+    def recall(self) -> float:
+        if not self.bites:
+            return 0.0
+
+        return self._matched() / len(self.bites)
+
+
+def replay(
+        recording: Recording,
+        motion_detector: MotionDetector,
+        tolerance: float = BITE_TOLERANCE_DEFAULT
+) -> ReplayResult:
+    result = ReplayResult(bites=list(recording.bites), tolerance=tolerance)
+
+    now = float(recording.timestamps[0]) if len(recording) else 0.0
+    state_machine = FishingStateMachine(
+        cast=lambda: result.casts.append(now),
+        reel_in=lambda: result.reel_ins.append(now),
+        clock=lambda: now
+    )
+
+    detect_ns = np.empty(len(recording), dtype=np.int64)
+    state_machine_ns = np.empty(len(recording), dtype=np.int64)
+    result.motion = np.empty(len(recording), dtype=bool)
+
+    start = time.perf_counter()
+    for i, (frame, timestamp) in enumerate(zip(recording.frames, recording.timestamps)):
+        now = float(timestamp)
+
+        t0 = time.perf_counter_ns()
+        if recording.preprocessed:
+            _, _, motion_detected = motion_detector.detect_preprocessed(frame)
+        else:
+            _, _, motion_detected = motion_detector.detect(frame)
+        t1 = time.perf_counter_ns()
+        state_machine.update(motion_detected)
+        t2 = time.perf_counter_ns()
+
+        detect_ns[i] = t1 - t0
+        state_machine_ns[i] = t2 - t1
+        result.motion[i] = motion_detected
+        result.skipped_frames += motion_detector.skipped
+
+    result.processing_time = time.perf_counter() - start
+    result.frames = len(recording)
+    result.stage_latencies = {
+        'detect': detect_ns,
+        'state_machine': state_machine_ns
+    }
+
+    return result
+
+
+def compare_pipelines(
+        recording: Recording,
+        motion_detector_factory: Callable[[PreprocessPipeline], MotionDetector],
+        tolerance: float = BITE_TOLERANCE_DEFAULT
+) -> tuple[dict[PreprocessPipeline, ReplayResult], float]:
+    """
+    Validates the downscaled pipeline against the full one on the same recorded frames.
+
+    @param motion_detector_factory: creates a detector with the settings under test for the given pipeline.
+    @return: (result per pipeline, fraction of frames on which the motion decisions of all pipelines agree).
+    """
+    if recording.preprocessed:
+        raise ValueError('Pipelines can only be compared on raw recordings')
+
+    results = {
+        pipeline: replay(recording, motion_detector_factory(pipeline), tolerance=tolerance)
+        for pipeline in PreprocessPipeline
+    }
+
+    decisions = np.stack([result.motion for result in results.values()])
+    agreement = float(np.mean(np.all(decisions == decisions[0], axis=0))) if len(recording) else 1.0
+
+    return results, agreement
+
+
+def _print_result(result: ReplayResult) -> None:
+    skip_ratio = result.skipped_frames / result.frames if result.frames else 0.0
+    print(f'Frames: {result.frames}, {result.fps:,.0f} frames/s, skipped: {skip_ratio:.1%}')
+
+    for stage in result.stage_latencies:
+        percentiles = ', '.join(f'p{p} {value:,.1f} us' for p, value in result.percentiles(stage).items())
+        print(f'  {stage}: {percentiles}')
+
+    print(f'Casts: {len(result.casts)}, reel-ins: {len(result.reel_ins)}, bites: {len(result.bites)}')
+    print(f'Precision: {result.precision:.3f}, recall: {result.recall:.3f} (tolerance {result.tolerance} s)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording')
+    parser.add_argument('--mode', choices=[mode.value for mode in DetectionMode], default=MotionDetector.MODE_DEFAULT.value)
+    parser.add_argument('--binarization-threshold', type=int, default=MotionDetector.BINARIZATION_THRESHOLD_DEFAULT)
+    parser.add_argument('--difference-threshold', type=int, default=MotionDetector.DIFFERENCE_THRESHOLD_DEFAULT)
+    parser.add_argument('--sensitivity', type=int, default=MotionDetector.SENSITIVITY_DEFAULT)
+    parser.add_argument('--history-depth', type=int, default=MotionDetector.HISTORY_DEPTH_DEFAULT)
+    parser.add_argument('--learning-rate', type=int, default=MotionDetector.LEARNING_RATE_DEFAULT)
+    parser.add_argument('--blur-kernel-size', type=int, default=MotionDetector.BLUR_KERNEL_SIZE_DEFAULT,
+                        help='odd Gaussian kernel size, 0 scales it to the recorded region size')
+    parser.add_argument('--blur-mode', choices=[blur_mode.value for blur_mode in BlurMode],
+                        default=MotionDetector.BLUR_MODE_DEFAULT.value)
+    parser.add_argument('--pipeline', choices=[pipeline.value for pipeline in PreprocessPipeline],
+                        default=MotionDetector.PIPELINE_DEFAULT.value)
+    parser.add_argument('--no-skip-static-frames', action='store_true',
+                        help='run the full pipeline on every frame, however little it changed')
+    parser.add_argument('--static-tolerance', type=int, default=MotionDetector.STATIC_TOLERANCE_DEFAULT,
+                        help='largest per-pixel change, in grey levels, of a static frame')
+    parser.add_argument('--compare-pipelines', action='store_true',
+                        help='replay through every preprocessing pipeline and compare their motion decisions')
+    parser.add_argument('--tolerance', type=float, default=BITE_TOLERANCE_DEFAULT,
+                        help='max seconds between a bite marker and the reel-in that counts as catching it')
+    args = parser.parse_args()
+
+    def motion_detector_factory(pipeline: PreprocessPipeline) -> MotionDetector:
+        return MotionDetector(
+            binary_threshold=args.binarization_threshold,
+            difference_threshold=args.difference_threshold,
+            sensitivity=args.sensitivity,
+            history_depth=args.history_depth,
+            mode=args.mode,
+            learning_rate=args.learning_rate,
+            blur_kernel_size=args.blur_kernel_size,
+            pipeline=pipeline,
+            blur_mode=args.blur_mode,
+            skip_static_frames=not args.no_skip_static_frames,
+            static_tolerance=args.static_tolerance
+        )
+
+    recording = load_recording(args.recording)
+
+    if not args.compare_pipelines:
+        _print_result(replay(recording, motion_detector_factory(args.pipeline), tolerance=args.tolerance))
+        return
+
+    results, agreement = compare_pipelines(recording, motion_detector_factory, tolerance=args.tolerance)
+    for pipeline, result in results.items():
+        print(f'[{pipeline.value}]')
+        _print_result(result)
+    print(f'Motion decisions agree on {agreement:.1%} of frames')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import base64
+
+import numpy as np
+
+from lazy_import import lazy_module
+
+cv2 = lazy_module('cv2')
+
+__all__ = [
+    'encode_mask',
+    'decode_mask',
+    'fit_mask',
+    'mask_from_variance'
+]
+
+# Smallest share of the region an automatically derived mask keeps, however noisy the region is
+MIN_KEPT_FRACTION = 0.1
+
+
+def encode_mask(mask: np.ndarray | None) -> str:
+    """
+    @param mask: (height, width) array, nonzero pixels are inside the region of interest.
+    @return: '<height>x<width>:<base64 of the bit-packed mask>', empty for no mask.
+    """
+    if mask is None:
+        return ''
+
+    height, width = mask.shape
+    packed = np.packbits(mask.ravel() > 0)
+
+    return f'{height}x{width}:{base64.b64encode(packed.tobytes()).decode("ascii")}'
+
+
+def decode_mask(encoded: str) -> np.ndarray | None:
+    """
+    @return: uint8 mask with 255 inside the region of interest, None for an empty string.
+    """
+    if not encoded:
+        return None
+
+    shape, data = encoded.split(':', maxsplit=1)
+    height, width = map(int, shape.split('x'))
+    bits = np.unpackbits(np.frombuffer(base64.b64decode(data), dtype=np.uint8), count=height * width)
+
+    return (bits.reshape(height, width) * 255).astype(np.uint8)
+
+
+def fit_mask(mask: np.ndarray, height: int, width: int) -> np.ndarray:
+    """
+    @return: the mask scaled to (height, width), or the mask itself if it already has that shape.
+    """
+    if mask.shape == (height, width):
+        return mask
+
+    return cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+
+
+def mask_from_variance(variance: np.ndarray, max_deviation: float) -> np.ndarray:
+    """
+    Masks out pixels that keep changing on their own, such as water, lava glow and torches.
+
+    @param variance: per-pixel variance of the preprocessed frames over a period without bites.
+    @param max_deviation: standard deviation above which a pixel is considered noise.
+    @return: uint8 mask, 255 for pixels kept. At least `MIN_KEPT_FRACTION` of the quietest pixels are kept.
+    """
+    limit = max(max_deviation ** 2, float(np.quantile(variance, MIN_KEPT_FRACTION)))
+
+    return np.where(variance <= limit, 255, 0).astype(np.uint8)
@@ -0,0 +1,230 @@
+import csv
+import threading
+import time
+from pathlib import Path
+from typing import Any, TextIO
+
+import numpy as np
+
+from atomic_write import write_atomically, write_json
+from statemachine import CAST_SETTLE_DURATION, TransitionEvent, TransitionKind
+
+__all__ = [
+    'FALSE_POSITIVE_WINDOW',
+    'SessionStatistics',
+    'format_session'
+]
+
+# Reel-ins sooner than this after the cast settled are counted as false positives: they are set off by the last
+# ripples of a splash that outlasted `CAST_SETTLE_DURATION` rather than by a bite. A fifth of the settling wait,
+# bites in recordings have come as soon as a quarter of a second after it
+FALSE_POSITIVE_WINDOW = CAST_SETTLE_DURATION / 5
+
+
+class SessionStatistics:
+    """
+    Fishing throughput of the session: casts, bites and reel-ins counted into fixed time buckets.
+
+    The last `buckets` buckets of `bucket_duration` seconds are kept in preallocated ring arrays, so memory stays
+    constant however long the session runs. Rates are reported over that window, totals over the whole session.
+
+    A bite is the first motion after a cast has settled, its wait is measured from the settling.
+    Reel-ins within `false_positive_window` seconds of the cast settling are false reel-ins, they caught nothing.
+    Transitions may be observed from any thread.
+    """
+
+    BUCKET_DURATION_DEFAULT = 60.0
+    BUCKETS_DEFAULT = 60
+
+    CASTS = 'casts'
+    BITES = 'bites'
+    REEL_INS = 'reel_ins'
+    FALSE_REEL_INS = 'false_reel_ins'
+
+    COUNTERS = (CASTS, BITES, REEL_INS, FALSE_REEL_INS)
+
+    def __init__(
+            self,
+            bucket_duration: float = BUCKET_DURATION_DEFAULT,
+            buckets: int = BUCKETS_DEFAULT,
+            false_positive_window: float = FALSE_POSITIVE_WINDOW
+    ) -> None:
+        self._bucket_duration = bucket_duration
+        self._false_positive_window = false_positive_window
+        self._lock = threading.Lock()
+
+        # Index of the bucket every slot currently holds, -1 for none
+        self._indices = np.full(buckets, -1, dtype=np.int64)
+        self._counts = {counter: np.zeros(buckets, dtype=np.int64) for counter in SessionStatistics.COUNTERS}
+        self._wait_sums = np.zeros(buckets, dtype=np.float64)
+
+        self._totals = dict.fromkeys(SessionStatistics.COUNTERS, 0)
+        self._total_wait = 0.0
+        self._start_time: float | None = None
+        # Per region: time the last cast settled, and the same until the bite
+        self._last_settle_times: dict[int, float] = {}
+        self._settle_times: dict[int, float] = {}
+
+    @property
+    def bucket_duration(self) -> float:
+        return self._bucket_duration
+
+    def observe(self, event: TransitionEvent, region: int = 0) -> bool:
+        """
+        @param event: transition of the state machine fishing `region`.
+        @return: whether `event` is a false reel-in.
+        """
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = event.timestamp
+
+            if event.kind == TransitionKind.CAST_ISSUED:
+                self._last_settle_times.pop(region, None)
+                self._settle_times.pop(region, None)
+                self._count(event.timestamp, SessionStatistics.CASTS)
+            elif event.kind == TransitionKind.CAST_SETTLED:
+                self._last_settle_times[region] = event.timestamp
+                self._settle_times[region] = event.timestamp
+            elif event.kind == TransitionKind.FIRST_MOTION:
+                settle_time = self._settle_times.pop(region, None)
+                if settle_time is None:
+                    return False
+
+                wait = event.timestamp - settle_time
+                self._count(event.timestamp, SessionStatistics.BITES)
+                self._wait_sums[self._slot(event.timestamp)] += wait
+                self._total_wait += wait
+            elif event.kind == TransitionKind.REEL_IN_ISSUED:
+                self._count(event.timestamp, SessionStatistics.REEL_INS)
+                settle_time = self._last_settle_times.get(region)
+                if settle_time is not None and event.timestamp - settle_time < self._false_positive_window:
+                    self._count(event.timestamp, SessionStatistics.FALSE_REEL_INS)
+                    return True
+
+        return False
+
+    def snapshot(self, now: float | None = None) -> dict[str, Any]:
+        """
+        @param now: time on the state machine clock, defaults to now.
+        @return: {'timestamp': ..., 'duration': s, 'totals': {...}, 'casts_per_hour': ..., 'bites_per_hour': ...,
+        'reel_ins_per_hour': ..., 'catches_per_hour': ..., 'mean_wait': s, 'session_mean_wait': s,
+        'false_reel_in_rate': ...}.
+        Rates cover the buckets within the window.
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            duration = 0.0 if self._start_time is None else max(now - self._start_time, 0.0)
+            valid = self._valid(now)
+            counts = {counter: int(counts[valid].sum()) for counter, counts in self._counts.items()}
+            wait_sum = float(self._wait_sums[valid].sum())
+            totals = dict(self._totals)
+            total_wait = self._total_wait
+
+        # The oldest bucket in the window may have been partly dropped already, rates only cover the rest
+        window_start = (int(now // self._bucket_duration) - len(self._indices) + 1) * self._bucket_duration
+        hours = (now - max(window_start, now - duration)) / 3_600
+
+        def per_hour(count: int) -> float:
+            return count / hours if hours > 0 else 0.0
+
+        return {
+            'timestamp': now,
+            'duration': duration,
+            'totals': totals,
+            'casts_per_hour': per_hour(counts[SessionStatistics.CASTS]),
+            'bites_per_hour': per_hour(counts[SessionStatistics.BITES]),
+            'reel_ins_per_hour': per_hour(counts[SessionStatistics.REEL_INS]),
+            'catches_per_hour': per_hour(counts[SessionStatistics.REEL_INS] - counts[SessionStatistics.FALSE_REEL_INS]),
+            'mean_wait': wait_sum / counts[SessionStatistics.BITES] if counts[SessionStatistics.BITES] else 0.0,
+            'session_mean_wait': total_wait / totals[SessionStatistics.BITES] if totals[SessionStatistics.BITES] else 0.0,
+            'false_reel_in_rate': (
+                counts[SessionStatistics.FALSE_REEL_INS] / counts[SessionStatistics.REEL_INS]
+                if counts[SessionStatistics.REEL_INS] else 0.0
+            )
+        }
+
+    def buckets(self, now: float | None = None) -> list[dict[str, Any]]:
+        """
+        @return: the buckets within the window, oldest first, as {'start': ..., <counter>: ..., 'mean_wait': s}.
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            valid = self._valid(now)
+            order = np.argsort(self._indices[valid])
+            indices = self._indices[valid][order]
+            counts = {counter: counts[valid][order] for counter, counts in self._counts.items()}
+            wait_sums = self._wait_sums[valid][order]
+
+        rows = []
+        for i, index in enumerate(indices):
+            bites = int(counts[SessionStatistics.BITES][i])
+            rows.append({
+                'start': float(index * self._bucket_duration),
+                **{counter: int(values[i]) for counter, values in counts.items()},
+                'mean_wait': float(wait_sums[i] / bites) if bites else 0.0
+            })
+
+        return rows
+
+    def save(self, path: str | Path) -> None:
+        """
+        Exports the statistics. A `.csv` path gets one row per bucket,
+        any other path gets JSON with the snapshot and the buckets.
+        """
+        path = Path(path)
+        now = time.time()
+        buckets = self.buckets(now)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if path.suffix == '.csv':
+            def write(statistics_file: TextIO) -> None:
+                writer = csv.DictWriter(statistics_file, fieldnames=['start', *SessionStatistics.COUNTERS, 'mean_wait'])
+                writer.writeheader()
+                writer.writerows(buckets)
+
+            write_atomically(path, write, newline='')
+        else:
+            write_json(path, {**self.snapshot(now), 'buckets': buckets})
+
+    def _count(self, timestamp: float, counter: str) -> None:
+        self._counts[counter][self._slot(timestamp)] += 1
+        self._totals[counter] += 1
+
+    def _slot(self, timestamp: float) -> int:
+        """
+        @return: the slot of the bucket of `timestamp`, cleared if it held an older bucket.
+        """
+        index = int(timestamp // self._bucket_duration)
+        slot = index % len(self._indices)
+
+        if self._indices[slot] != index:
+            self._indices[slot] = index
+            for counts in self._counts.values():
+                counts[slot] = 0
+            self._wait_sums[slot] = 0.0
+
+        return slot
+
+    def _valid(self, now: float) -> np.ndarray:
+        """
+        @return: mask of the slots holding buckets within the window ending at `now`.
+        """
+        current = int(now // self._bucket_duration)
+
+        return (self._indices > current - len(self._indices)) & (self._indices <= current)
+
+
+def format_session(snapshot: dict[str, Any]) -> str:
+    totals = snapshot['totals']
+    minutes, seconds = divmod(int(snapshot['duration']), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return '\n'.join([
+        f'session: {hours}:{minutes:02}:{seconds:02}, '
+        + ', '.join(f'{name}: {value}' for name, value in totals.items()),
+        f'per hour: {snapshot["casts_per_hour"]:.0f} casts, {snapshot["reel_ins_per_hour"]:.0f} reel-ins, '
+        f'{snapshot["catches_per_hour"]:.0f} catches',
+        f'wait to bite: {snapshot["mean_wait"]:.1f} s, false reel-ins: {snapshot["false_reel_in_rate"]:.0%}'
+    ])
@@ -1,6 +1,40 @@
 import time
+from dataclasses import dataclass
+from enum import Enum
 from typing import Any, Callable
 
+__all__ = [
+    'CAST_SETTLE_DURATION',
+    'TransitionKind',
+    'TransitionEvent',
+    'FishingStateMachine'
+]
+
+
+# Seconds from the cast until motion is watched for, the bobber flies and splashes down meanwhile
+CAST_SETTLE_DURATION = 1.0
+
+
+class TransitionKind(str, Enum):
+    CAST_ISSUED = 'cast_issued'
+    CAST_SETTLED = 'cast_settled'
+    FIRST_MOTION = 'first_motion'
+    REEL_IN_ISSUED = 'reel_in_issued'
+
+
+@dataclass(frozen=True)
+class TransitionEvent:
+    """
+    @param timestamp: state machine clock time of the transition.
+    @param frame_timestamp: capture time of the frame being processed when the transition happened.
+    @param latency: for `REEL_IN_ISSUED`, seconds from the capture of the frame
+    in which motion appeared to the reel-in click.
+    """
+    kind: TransitionKind
+    timestamp: float
+    frame_timestamp: float
+    latency: float | None = None
+
 
 def _distance(p1: tuple[int, int], p2: tuple[int, int]) -> float:
     x1, y1 = p1
@@ -18,7 +52,7 @@ class _State:
     def next(self) -> Any:
         raise NotImplemented()
 
-    def act(self, motion: bool) -> None:
+    def act(self, motion: bool, frame_timestamp: float) -> None:
         raise NotImplemented()
 
 
@@ -26,10 +60,22 @@ class _StateFactory:
     def __init__(
             self,
             cast_fn: Callable[[], None],
-            reel_in_fn: Callable[[], None]
+            reel_in_fn: Callable[[], None],
+            clock: Callable[[], float],
+            emit: Callable[[TransitionEvent], None]
     ) -> None:
         self._cast_fn = cast_fn
         self._reel_in_fn = reel_in_fn
+        self._clock = clock
+        self._emit = emit
+
+    @property
+    def clock(self) -> Callable[[], float]:
+        return self._clock
+
+    @property
+    def emit(self) -> Callable[[TransitionEvent], None]:
+        return self._emit
 
     def waiting_before_cast(self) -> _State:
         return _WaitingBeforeCast(self, self._cast_fn)
@@ -52,7 +98,7 @@ class _WaitingBeforeCast(_State):
         self._state_factory: _StateFactory = state_factory
         self._cast_fn: Callable[[], None] = cast_fn
 
-        self._wait_start_time: float = time.time()
+        self._wait_start_time: float = state_factory.clock()
         self._casted: bool = False
 
     @property
@@ -66,24 +112,27 @@ class _WaitingBeforeCast(_State):
 
         return self
 
-    def act(self, _: bool) -> None:
-        elapsed = time.time() - self._wait_start_time
+    def act(self, _: bool, frame_timestamp: float) -> None:
+        now = self._state_factory.clock()
+        elapsed = now - self._wait_start_time
         if elapsed < _WaitingBeforeCast.CAST_DELAY:
             return
 
+        self._state_factory.emit(TransitionEvent(TransitionKind.CAST_ISSUED, now, frame_timestamp))
         self._cast_fn()
         self._casted = True
 
 
 class _Casting(_State):
-    CAST_DURATION = 1.0
+    CAST_DURATION = CAST_SETTLE_DURATION
 
     def __init__(
             self,
             state_factory: _StateFactory,
     ) -> None:
         self._state_factory: _StateFactory = state_factory
-        self._wait_start_time: float = time.time()
+        self._wait_start_time: float = state_factory.clock()
+        self._settled: bool = False
 
     @property
     def description(self) -> str:
@@ -91,15 +140,15 @@ class _Casting(_State):
 
     @property
     def next(self) -> _State:
-        elapsed = time.time() - self._wait_start_time
-
-        if elapsed < _Casting.CAST_DURATION:
-            return self
+        return self._state_factory.catching() if self._settled else self
 
-        return self._state_factory.catching()
+    def act(self, _: bool, frame_timestamp: float) -> None:
+        now = self._state_factory.clock()
+        if now - self._wait_start_time < _Casting.CAST_DURATION:
+            return
 
-    def act(self, _: bool) -> None:
-        pass
+        self._state_factory.emit(TransitionEvent(TransitionKind.CAST_SETTLED, now, frame_timestamp))
+        self._settled = True
 
 
 class _Catching(_State):
@@ -129,10 +178,20 @@ class _Catching(_State):
 
         return self
 
-    def act(self, motion: bool) -> None:
+    def act(self, motion: bool, frame_timestamp: float) -> None:
         if not motion:
             return
 
+        state_factory = self._state_factory
+        state_factory.emit(TransitionEvent(TransitionKind.FIRST_MOTION, state_factory.clock(), frame_timestamp))
+
+        now = state_factory.clock()
+        state_factory.emit(TransitionEvent(
+            TransitionKind.REEL_IN_ISSUED,
+            now,
+            frame_timestamp,
+            latency=now - frame_timestamp
+        ))
         self._reel_in_fn()
         self._caught = True
 
@@ -141,14 +200,41 @@ class FishingStateMachine:
     def __init__(
             self,
             cast: Callable[[], None],
-            reel_in: Callable[[], None]
+            reel_in: Callable[[], None],
+            clock: Callable[[], float] = time.time
     ) -> None:
-        self._args = (cast, reel_in)
+        """
+        @param clock: time source in seconds, replaceable to drive the machine from recorded timestamps.
+        """
+        self._clock = clock
+        self._subscribers: list[Callable[[TransitionEvent], None]] = []
+        self._state_factory = _StateFactory(cast, reel_in, clock, self._emit)
+
+        self._state: _State = self._state_factory.waiting_before_cast()
+
+    def subscribe(self, subscriber: Callable[[TransitionEvent], None]) -> None:
+        """
+        Subscribers are called synchronously on the thread calling `update`, keep them short.
+        Subscriptions survive `reset`.
+        """
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[TransitionEvent], None]) -> None:
+        self._subscribers.remove(subscriber)
 
-        self._state: _State = _StateFactory(cast, reel_in).waiting_before_cast()
+    def _emit(self, event: TransitionEvent) -> None:
+        for subscriber in self._subscribers:
+            subscriber(event)
+
+    def update(self, motion: bool, frame_timestamp: float | None = None) -> None:
+        """
+        @param frame_timestamp: capture time of the frame `motion` was detected in,
+        on the same clock as the state machine. Defaults to now.
+        """
+        if frame_timestamp is None:
+            frame_timestamp = self._clock()
 
-    def update(self, motion: bool) -> None:
-        self._state.act(motion)
+        self._state.act(motion, frame_timestamp)
         self._state = self._state.next
 
     @property
@@ -159,4 +245,4 @@ class FishingStateMachine:
         return self._state.description
 
     def reset(self) -> None:
-        self.__init__(*self._args)
+        self._state = self._state_factory.waiting_before_cast()